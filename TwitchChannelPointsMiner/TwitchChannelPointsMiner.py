@@ -4,28 +4,50 @@ import logging
 import os
 import random
 import signal
+import subprocess
 import sys
 import threading
 import time
 import uuid
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import urlparse
 
+from TwitchChannelPointsMiner.classes.AnalyticsStore import (
+    AnalyticsStore,
+    SqliteAnalyticsStore,
+)
+from TwitchChannelPointsMiner.classes.AnalyticsWriter import AnalyticsWriter
+from TwitchChannelPointsMiner.classes.AsyncWebSocketsPool import (
+    AsyncWebSocketsPool,
+    websockets,
+)
 from TwitchChannelPointsMiner.classes.Chat import ChatPresence, ThreadChat
 from TwitchChannelPointsMiner.classes.entities.PubsubTopic import PubsubTopic
 from TwitchChannelPointsMiner.classes.entities.Streamer import (
     Streamer,
+    StreamerList,
     StreamerSettings,
 )
 from TwitchChannelPointsMiner.classes.Exceptions import StreamerDoesNotExistException
-from TwitchChannelPointsMiner.classes.Settings import FollowersOrder, Priority, Settings
+from TwitchChannelPointsMiner.classes.Metrics import registry, start_metrics_server
+from TwitchChannelPointsMiner.classes.Profiler import SamplingProfiler
+from TwitchChannelPointsMiner.classes.Settings import (
+    AnalyticsBackend,
+    FollowersOrder,
+    Priority,
+    PubSubEngine,
+    Settings,
+)
 from TwitchChannelPointsMiner.classes.Twitch import Twitch
 from TwitchChannelPointsMiner.classes.WebSocketsPool import WebSocketsPool
+from TwitchChannelPointsMiner.constants import URL
 from TwitchChannelPointsMiner.logger import LoggerSettings, configure_loggers
 from TwitchChannelPointsMiner.utils import (
     _millify,
     at_least_one_value_in_settings_is,
     check_versions,
+    create_chunks,
     get_user_agent,
     internet_connection_available,
     set_default_settings,
@@ -45,6 +67,7 @@ logging.getLogger("werkzeug").setLevel(logging.ERROR)
 logging.getLogger("irc.client").setLevel(logging.ERROR)
 logging.getLogger("seleniumwire").setLevel(logging.ERROR)
 logging.getLogger("websocket").setLevel(logging.ERROR)
+logging.getLogger("websockets").setLevel(logging.ERROR)
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +92,9 @@ class TwitchChannelPointsMiner:
         "original_streamers",
         "logs_file",
         "queue_listener",
+        "bootstrap_workers",
+        "pubsub_engine",
+        "analytics_process",
     ]
 
     def __init__(
@@ -77,8 +103,16 @@ class TwitchChannelPointsMiner:
         password: str = None,
         claim_drops_startup: bool = False,
         enable_analytics: bool = False,
+        analytics_backend: AnalyticsBackend = AnalyticsBackend.JSON_LINES,
         disable_ssl_cert_verification: bool = False,
         disable_at_in_nickname: bool = False,
+        # Max GQL requests per second (global budget, None = unlimited) and threads used for load the streamers on startup
+        gql_rate_limit: float = None,
+        bootstrap_workers: int = 8,
+        # THREADS: one thread per PubSub connection, ASYNCIO: all of them on one event loop (pip install websockets)
+        pubsub_engine: PubSubEngine = PubSubEngine.THREADS,
+        # Timings of the hot paths (/metrics) and sampling profiler on SIGUSR1
+        enable_instrumentation: bool = False,
         # Settings for logging and selenium as you can see.
         priority: list = [Priority.STREAK, Priority.DROPS, Priority.ORDER],
         # This settings will be global shared trought Settings class
@@ -98,12 +132,14 @@ class TwitchChannelPointsMiner:
 
         Settings.disable_at_in_nickname = disable_at_in_nickname
 
+        Settings.enable_instrumentation = enable_instrumentation
+
         import socket
 
         def is_connected():
             try:
                 # resolve the IP address of the Twitch.tv domain name
-                socket.gethostbyname("twitch.tv")
+                socket.gethostbyname(urlparse(URL).hostname)
                 return True
             except OSError:
                 pass
@@ -125,6 +161,13 @@ class TwitchChannelPointsMiner:
                 Path().absolute(), "analytics", username
             )
             Path(Settings.analytics_path).mkdir(parents=True, exist_ok=True)
+            Settings.analytics_store = (
+                SqliteAnalyticsStore(Settings.analytics_path)
+                if analytics_backend == AnalyticsBackend.SQLITE
+                else AnalyticsStore(Settings.analytics_path)
+            )
+            Settings.analytics_writer = AnalyticsWriter(Settings.analytics_store)
+            Settings.analytics_writer.start()
 
         self.username = username
 
@@ -138,12 +181,17 @@ class TwitchChannelPointsMiner:
 
         # user_agent = get_user_agent("FIREFOX")
         user_agent = get_user_agent("CHROME")
-        self.twitch = Twitch(self.username, user_agent, password)
+        self.twitch = Twitch(
+            self.username, user_agent, password, rate_limit=gql_rate_limit
+        )
+        self.analytics_process = None
+        self.bootstrap_workers = bootstrap_workers
+        self.pubsub_engine = pubsub_engine
 
         self.claim_drops_startup = claim_drops_startup
         self.priority = priority if isinstance(priority, list) else [priority]
 
-        self.streamers = []
+        self.streamers = StreamerList()
         self.events_predictions = {}
         self.minute_watcher_thread = None
         self.sync_campaigns_thread = None
@@ -176,22 +224,91 @@ class TwitchChannelPointsMiner:
                 f"You are running version {current_version} of this script")
             logger.info(f"The latest version on GitHub is {github_version}")
 
+        self.__register_metrics()
+        if enable_instrumentation is True:
+            SamplingProfiler(self.username).register_signal()
+
         for sign in [signal.SIGINT, signal.SIGSEGV, signal.SIGTERM]:
             signal.signal(sign, self.end)
 
+    # Gauges read when the /metrics endpoint is requested
+    def __register_metrics(self):
+        registry.gauge(
+            "twitch_miner_points_earned",
+            "Channel points earned in this session, by streamer and reason code",
+            lambda: {
+                (streamer.username, reason_code): history["amount"]
+                for streamer in self.streamers
+                for reason_code, history in list(streamer.history.items())
+            },
+            ["streamer", "reason"],
+        )
+        registry.gauge(
+            "twitch_miner_logger_queue_size",
+            "Log records waiting for the logging thread",
+            lambda: self.queue_listener.queue.qsize(),
+        )
+        registry.gauge(
+            "twitch_miner_gql_batcher_pending",
+            "GQL operations waiting to be sent in a batch",
+            lambda: len(self.twitch.gql_batcher.pending),
+        )
+        if Settings.enable_analytics is True:
+            registry.gauge(
+                "twitch_miner_analytics_writer_queue_size",
+                "Analytics records waiting for the writer thread",
+                lambda: Settings.analytics_writer.queue.qsize()
+                + Settings.analytics_writer.pending_count,
+            )
+
+    # Standalone Prometheus endpoint, /metrics is available also on the analytics server
+    def metrics(self, host: str = "127.0.0.1", port: int = 9100):
+        start_metrics_server(host=host, port=port)
+
     def analytics(
         self,
         host: str = "127.0.0.1",
         port: int = 5000,
         refresh: int = 5,
         days_ago: int = 7,
+        workers: int = None,
+        separate_process: bool = False,
     ):
         # Analytics switch
-        if Settings.enable_analytics is True:
+        if Settings.enable_analytics is True and separate_process is True:
+            # The dashboard runs in another python process, reading the same analytics store
+            command = [
+                sys.executable,
+                "-m",
+                "TwitchChannelPointsMiner.classes.AnalyticsServer",
+                "--username", self.username,
+                "--host", host,
+                "--port", str(port),
+                "--refresh", str(refresh),
+                "--days-ago", str(days_ago),
+                "--backend", (
+                    AnalyticsBackend.SQLITE.name
+                    if isinstance(Settings.analytics_store, SqliteAnalyticsStore)
+                    else AnalyticsBackend.JSON_LINES.name
+                ),
+            ]
+            if workers is not None:
+                command += ["--workers", str(workers)]
+            if self.logs_file is not None:
+                command += ["--logs-file", self.logs_file]
+            self.analytics_process = subprocess.Popen(command)
+        elif Settings.enable_analytics is True:
             from TwitchChannelPointsMiner.classes.AnalyticsServer import AnalyticsServer
 
             http_server = AnalyticsServer(
-                host=host, port=port, refresh=refresh, days_ago=days_ago, username=self.username
+                host=host,
+                port=port,
+                refresh=refresh,
+                days_ago=days_ago,
+                username=self.username,
+                logs_file=self.logs_file,
+                queue_listener=self.queue_listener,
+                workers=workers,
             )
             http_server.daemon = True
             http_server.name = "Analytics Thread"
@@ -259,45 +376,8 @@ class TwitchChannelPointsMiner:
                 f"Loading data for {len(streamers_name)} streamers. Please wait...",
                 extra={"emoji": ":nerd_face:"},
             )
-            for username in streamers_name:
-                if username in streamers_name:
-                    time.sleep(random.uniform(0.3, 0.7))
-                    try:
-                        streamer = (
-                            streamers_dict[username]
-                            if isinstance(streamers_dict[username], Streamer) is True
-                            else Streamer(username)
-                        )
-                        streamer.channel_id = self.twitch.get_channel_id(
-                            username)
-                        streamer.settings = set_default_settings(
-                            streamer.settings, Settings.streamer_settings
-                        )
-                        streamer.settings.bet = set_default_settings(
-                            streamer.settings.bet, Settings.streamer_settings.bet
-                        )
-                        if streamer.settings.chat != ChatPresence.NEVER:
-                            streamer.irc_chat = ThreadChat(
-                                self.username,
-                                self.twitch.twitch_login.get_auth_token(),
-                                streamer.username,
-                            )
-                        self.streamers.append(streamer)
-                    except StreamerDoesNotExistException:
-                        logger.info(
-                            f"Streamer {username} does not exist",
-                            extra={"emoji": ":cry:"},
-                        )
-
-            # Populate the streamers with default values.
-            # 1. Load channel points and auto-claim bonus
-            # 2. Check if streamers are online
-            # 3. DEACTIVATED: Check if the user is a moderator. (was used before the 5th of April 2021 to deactivate predictions)
-            for streamer in self.streamers:
-                time.sleep(random.uniform(0.3, 0.7))
-                self.twitch.load_channel_points_context(streamer)
-                self.twitch.check_streamer_online(streamer)
-                # self.twitch.viewer_is_mod(streamer)
+            self.__load_streamers(streamers_name, streamers_dict)
+            self.twitch.channel_cache.save()
 
             self.original_streamers = [
                 streamer.channel_points for streamer in self.streamers
@@ -330,7 +410,15 @@ class TwitchChannelPointsMiner:
             self.minute_watcher_thread.name = "Minute watcher"
             self.minute_watcher_thread.start()
 
-            self.ws_pool = WebSocketsPool(
+            pool_class = WebSocketsPool
+            if self.pubsub_engine == PubSubEngine.ASYNCIO:
+                if websockets is None:
+                    logger.warning(
+                        "Can't use the asyncio PubSub engine, please install websockets (pip install websockets)"
+                    )
+                else:
+                    pool_class = AsyncWebSocketsPool
+            self.ws_pool = pool_class(
                 twitch=self.twitch,
                 streamers=self.streamers,
                 events_predictions=self.events_predictions,
@@ -345,42 +433,31 @@ class TwitchChannelPointsMiner:
                 logger.error("No user_id, exiting...")
                 self.end(0, 0)
 
-            self.ws_pool.submit(
-                PubsubTopic(
-                    "community-points-user-v1",
-                    user_id=user_id,
-                )
-            )
+            # Subscribe to all the topics at once: they are packed in a few LISTEN frames
+            topics = [PubsubTopic("community-points-user-v1", user_id=user_id)]
 
             # Going to subscribe to predictions-user-v1. Get update when we place a new prediction (confirm)
             if make_predictions is True:
-                self.ws_pool.submit(
-                    PubsubTopic(
-                        "predictions-user-v1",
-                        user_id=user_id,
-                    )
-                )
+                topics.append(PubsubTopic("predictions-user-v1", user_id=user_id))
 
             for streamer in self.streamers:
-                self.ws_pool.submit(
-                    PubsubTopic("video-playback-by-id", streamer=streamer)
-                )
+                topics.append(PubsubTopic("video-playback-by-id", streamer=streamer))
 
                 if streamer.settings.follow_raid is True:
-                    self.ws_pool.submit(PubsubTopic("raid", streamer=streamer))
+                    topics.append(PubsubTopic("raid", streamer=streamer))
 
                 if streamer.settings.make_predictions is True:
-                    self.ws_pool.submit(
-                        PubsubTopic("predictions-channel-v1",
-                                    streamer=streamer)
+                    topics.append(
+                        PubsubTopic("predictions-channel-v1", streamer=streamer)
                     )
 
                 if streamer.settings.claim_moments is True:
-                    self.ws_pool.submit(
-                        PubsubTopic("community-moments-channel-v1",
-                                    streamer=streamer)
+                    topics.append(
+                        PubsubTopic("community-moments-channel-v1", streamer=streamer)
                     )
 
+            self.ws_pool.submit_many(topics)
+
             refresh_context = time.time()
             while self.running:
                 time.sleep(random.uniform(20, 60))
@@ -395,16 +472,69 @@ class TwitchChannelPointsMiner:
                         logger.info(
                             f"#{index} - The last PING was sent more than 10 minutes ago. Reconnecting to the WebSocket..."
                         )
-                        WebSocketsPool.handle_reconnection(
-                            self.ws_pool.ws[index])
+                        self.ws_pool.handle_reconnection(self.ws_pool.ws[index])
 
                 if ((time.time() - refresh_context) // 60) >= 30:
                     refresh_context = time.time()
-                    for index in range(0, len(self.streamers)):
-                        if self.streamers[index].is_online:
-                            self.twitch.load_channel_points_context(
-                                self.streamers[index]
-                            )
+                    self.twitch.load_channel_points_contexts(
+                        [streamer for streamer in self.streamers if streamer.is_online]
+                    )
+
+    def __load_streamers(self, streamers_name, streamers_dict, chunk_size=100):
+        # Each chunk costs a few batched GQL requests (20 operations per request)
+        # instead of 2-3 requests per streamer
+        processed = 0
+        for chunk in create_chunks(streamers_name, chunk_size):
+            channel_ids = self.twitch.get_channel_ids(chunk)
+            streamers = []
+            for username in chunk:
+                try:
+                    streamer = (
+                        streamers_dict[username]
+                        if isinstance(streamers_dict[username], Streamer) is True
+                        else Streamer(username)
+                    )
+                    if username not in channel_ids:
+                        # The batched request failed, fallback to the single request
+                        streamer.channel_id = self.twitch.get_channel_id(username)
+                    elif channel_ids[username] is None:
+                        raise StreamerDoesNotExistException
+                    else:
+                        streamer.channel_id = channel_ids[username]
+                    streamer.settings = set_default_settings(
+                        streamer.settings, Settings.streamer_settings
+                    )
+                    streamer.settings.bet = set_default_settings(
+                        streamer.settings.bet, Settings.streamer_settings.bet
+                    )
+                    if streamer.settings.chat != ChatPresence.NEVER:
+                        streamer.irc_chat = ThreadChat(
+                            self.username,
+                            self.twitch.twitch_login.get_auth_token(),
+                            streamer.username,
+                        )
+                    streamers.append(streamer)
+                except StreamerDoesNotExistException:
+                    logger.info(
+                        f"Streamer {username} does not exist",
+                        extra={"emoji": ":cry:"},
+                    )
+
+            # Populate the streamers with default values.
+            # 1. Load channel points and auto-claim bonus
+            # 2. Check if streamers are online
+            # 3. DEACTIVATED: Check if the user is a moderator. (was used before the 5th of April 2021 to deactivate predictions)
+            self.twitch.load_channel_points_contexts(streamers)
+            self.twitch.check_streamers_online(
+                streamers, max_workers=self.bootstrap_workers
+            )
+            self.streamers += streamers
+
+            processed += len(chunk)
+            logger.info(
+                f"Loaded {len(self.streamers)} streamers ({processed}/{len(streamers_name)} processed)",
+                extra={"emoji": ":nerd_face:"},
+            )
 
     def end(self, signum, frame):
         logger.info("CTRL+C Detected! Please wait just a moment!")
@@ -435,6 +565,15 @@ class TwitchChannelPointsMiner:
                 streamer.mutex.acquire()
                 streamer.mutex.release()
 
+        # Write on disk the analytics still in memory
+        if Settings.enable_analytics is True:
+            Settings.analytics_writer.stop()
+
+        if self.analytics_process is not None:
+            self.analytics_process.terminate()
+
+        self.twitch.channel_cache.save()
+
         self.__print_report()
 
         # Stop the queue listener to make sure all messages have been logged
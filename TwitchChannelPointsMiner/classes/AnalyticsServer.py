@@ -1,46 +1,305 @@
+import argparse
+import gzip
+import hashlib
 import json
 import logging
 import os
+import queue
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from threading import Thread
+from threading import Lock, Thread
 
-import pandas as pd
 from flask import Flask, Response, cli, render_template, request
 
-from TwitchChannelPointsMiner.classes.Settings import Settings
+from TwitchChannelPointsMiner.classes.AnalyticsStore import (
+    AnalyticsStore,
+    SqliteAnalyticsStore,
+)
+from TwitchChannelPointsMiner.classes.Metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+)
+from TwitchChannelPointsMiner.classes.Metrics import registry
+from TwitchChannelPointsMiner.classes.Settings import AnalyticsBackend, Settings
+from TwitchChannelPointsMiner.logger import attach_log_broadcaster
 from TwitchChannelPointsMiner.utils import download_file
 
+# Optional, used for the responses if installed (pip install brotli)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 cli.show_server_banner = lambda *_: None
 logger = logging.getLogger(__name__)
 
 
-def streamers_available():
-    path = Settings.analytics_path
-    return [
-        f
-        for f in os.listdir(path)
-        if os.path.isfile(os.path.join(path, f)) and f.endswith(".json")
-    ]
-
-
-def aggregate(df, freq="30Min"):
-    df_base_events = df[(df.z == "Watch") | (df.z == "Claim")]
-    df_other_events = df[(df.z != "Watch") & (df.z != "Claim")]
+# Series and annotations sorted by timestamp, with the timestamps in a separate column.
+# A date range is found with a binary search: O(log n + k) instead of a scan of the whole history
+class IndexedDatas(object):
+    __slots__ = ["series", "series_x", "annotations", "annotations_x"]
 
-    be = df_base_events.groupby(
-        [pd.Grouper(freq=freq, key="datetime"), "z"]).max()
-    be = be.reset_index()
+    def __init__(self, datas):
+        # The files are written in chronological order, the sort is almost free
+        self.series = sorted(
+            datas.get("series", []), key=lambda point: (point["x"], point["y"] or 0)
+        )
+        self.series_x = array("d", (point["x"] for point in self.series))
+        self.annotations = sorted(
+            datas.get("annotations", []), key=lambda annotation: annotation["x"]
+        )
+        self.annotations_x = array(
+            "d", (annotation["x"] for annotation in self.annotations)
+        )
 
-    oe = df_other_events.groupby(
-        [pd.Grouper(freq=freq, key="datetime"), "z"]).max()
-    oe = oe.reset_index()
+    def __len__(self):
+        return len(self.series) + len(self.annotations)
+
+    def series_between(self, start, end):
+        lo = bisect_left(self.series_x, start)
+        hi = bisect_right(self.series_x, end)
+        return self.series[lo:hi]
+
+    def annotations_between(self, start, end):
+        lo = bisect_left(self.annotations_x, start)
+        hi = bisect_right(self.annotations_x, end)
+        return self.annotations[lo:hi]
+
+    # Last known balance before start
+    def last_point_before(self, start):
+        index = bisect_left(self.series_x, start)
+        return self.series[index - 1] if index > 0 else None
+
+    # Timestamp of the last record between start and end, 0 if there isn't any
+    def last_x(self, start, end):
+        last_x = 0
+        for items, column in [
+            (self.series, self.series_x),
+            (self.annotations, self.annotations_x),
+        ]:
+            index = bisect_right(column, end) - 1
+            if index >= 0 and column[index] >= start:
+                last_x = max(last_x, items[index]["x"])
+        return last_x
+
+
+# In-memory cache of the datas read from the analytics store.
+# An entry is valid until the store version (mtime+size of the file, or the SQLite counter) changes.
+# The least recently used entries are removed when we have more than max_points points in memory
+class AnalyticsCache(object):
+    __slots__ = [
+        "max_points",
+        "max_results",
+        "entries",
+        "results",
+        "summaries",
+        "points",
+        "mutex",
+    ]
 
-    result = pd.concat([be, oe])
-    return result
+    def __init__(self, max_points: int = 500000, max_results: int = 256):
+        self.max_points = max_points
+        self.max_results = max_results
+        # {(streamer, start, end): (version, datas)}
+        self.entries = OrderedDict()
+        # Filtered and downsampled responses {(streamer, ...params): (version, result)}
+        self.results = OrderedDict()
+        # {streamer: (version, {"points": ..., "last_activity": ...})}
+        self.summaries = {}
+        self.points = 0
+        self.mutex = Lock()
+
+    def read(self, streamer, start=None, end=None):
+        store = Settings.analytics_store
+        if store.range_queries is False:
+            # The whole file is read anyway, share the same entry between all the ranges
+            start = end = None
+
+        version = store.version(streamer)
+        if version is None:
+            return None
+
+        key = (streamer, start, end)
+        with self.mutex:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(key)
+                return entry[1]
+
+        datas = store.read(streamer, start, end)
+        if datas is None:
+            return None
+        datas = IndexedDatas(datas)
+
+        with self.mutex:
+            if key in self.entries:
+                self.points -= len(self.entries.pop(key)[1])
+            self.entries[key] = (version, datas)
+            self.points += len(datas)
+            while self.points > self.max_points and len(self.entries) > 1:
+                _, (_, removed) = self.entries.popitem(last=False)
+                self.points -= len(removed)
+        return datas
+
+    # Return the cached result for key (key[0] is the streamer), or compute and save it
+    def result(self, key, compute):
+        version = Settings.analytics_store.version(key[0])
+        with self.mutex:
+            entry = self.results.get(key)
+            if entry is not None and entry[0] == version:
+                self.results.move_to_end(key)
+                return entry[1]
+
+        result = compute()
+        with self.mutex:
+            self.results[key] = (version, result)
+            self.results.move_to_end(key)
+            while len(self.results) > self.max_results:
+                self.results.popitem(last=False)
+        return result
+
+    # Last balance and last activity of the streamer, used by the streamers list
+    def summary(self, streamer):
+        store = Settings.analytics_store
+        version = store.version(streamer)
+        summary = self.summaries.get(streamer)
+        if summary is not None and summary[0] == version:
+            return summary[1]
+
+        last_point = store.last_point(streamer)
+        summary = {
+            "points": 0 if last_point is None else last_point["y"],
+            "last_activity": 0 if last_point is None else last_point["x"],
+        }
+        self.summaries[streamer] = (version, summary)
+        return summary
+
+
+analytics_cache = AnalyticsCache()
+
+# Compressed bodies of the last JSON responses {(etag, encoding): body}
+encoded_responses = OrderedDict()
+encoded_responses_lock = Lock()
+
+
+# JSON response with a strong ETag computed from etag_parts (the versions of the datas and
+# the parameters of the request). If the client has already the same response we return a
+# 304 without building it, otherwise build() is serialized and compressed once per encoding
+def json_response(etag_parts, build, max_encoded_responses: int = 64):
+    accept_encodings = request.accept_encodings
+    if brotli is not None and accept_encodings["br"]:
+        encoding = "br"
+    elif accept_encodings["gzip"]:
+        encoding = "gzip"
+    else:
+        encoding = None
+
+    # Each encoding is a different representation, it needs a different strong ETag
+    etag = hashlib.sha1(repr((etag_parts, encoding)).encode("utf-8")).hexdigest()
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+        response.set_etag(etag)
+        return response
+
+    with encoded_responses_lock:
+        body = encoded_responses.get((etag, encoding))
+    if body is None:
+        body = json.dumps(build()).encode("utf-8")
+        if encoding == "br":
+            body = brotli.compress(body, quality=5)
+        elif encoding == "gzip":
+            body = gzip.compress(body, compresslevel=6)
+        with encoded_responses_lock:
+            encoded_responses[(etag, encoding)] = body
+            while len(encoded_responses) > max_encoded_responses:
+                encoded_responses.popitem(last=False)
+
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    response = Response(body, status=200, mimetype="application/json", headers=headers)
+    response.set_etag(etag)
+    return response
+
+
+def streamers_versions():
+    return [
+        (streamer, Settings.analytics_store.version(streamer))
+        for streamer in sorted(streamers_available())
+    ]
 
 
-def filter_datas(start_date, end_date, datas):
+def streamers_available():
+    return Settings.analytics_store.streamers()
+
+
+# Keep the point with the highest balance for each reason in each bucket of resolution minutes
+def bucket_max(series, resolution):
+    width = resolution * 60 * 1000
+    buckets = {}
+    for point in series:
+        key = (point["x"] // width, point.get("z"))
+        if key not in buckets or point["y"] > buckets[key]["y"]:
+            buckets[key] = point
+    return sorted(buckets.values(), key=lambda point: (point["x"], point["y"]))
+
+
+# Largest-Triangle-Three-Buckets: https://skemman.is/bitstream/1946/15343/3/SS_MSthesis.pdf
+# Reduce the series (sorted by x) to max_points keeping the visual shape of the line.
+# The points in keep (indexes) are always returned, e.g. the points with an annotation
+def lttb(series, max_points, keep=()):
+    if max_points < 3 or len(series) <= max_points:
+        return series
+
+    selected = {0, len(series) - 1}
+    selected.update(keep)
+    # The first and the last points are always selected
+    bucket_size = (len(series) - 2) / (max_points - 2)
+    previous = 0
+    for i in range(max_points - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        # Average of the next bucket, the last point for the last bucket
+        next_start = end
+        next_end = min(int((i + 2) * bucket_size) + 1, len(series))
+        next_bucket = series[next_start:next_end] or [series[-1]]
+        avg_x = sum(point["x"] for point in next_bucket) / len(next_bucket)
+        avg_y = sum(point["y"] for point in next_bucket) / len(next_bucket)
+
+        x, y = series[previous]["x"], series[previous]["y"]
+        max_area = -1
+        for j in range(start, end):
+            area = abs(
+                (x - avg_x) * (series[j]["y"] - y) - (x - series[j]["x"]) * (avg_y - y)
+            )
+            if area > max_area:
+                max_area = area
+                previous = j
+        selected.add(previous)
+
+    return [series[i] for i in sorted(selected)]
+
+
+def downsample(datas, resolution=None, max_points=None):
+    series = datas["series"]
+    if resolution is not None and resolution > 0:
+        series = bucket_max(series, resolution)
+    if max_points is not None:
+        # Don't lose the points where something happened (bets, raids, ...)
+        annotated = {annotation["x"] for annotation in datas.get("annotations", [])}
+        keep = [
+            i
+            for i, point in enumerate(series)
+            if point["x"] in annotated or point.get("z") not in ["Watch", "Claim"]
+        ]
+        series = lttb(series, max_points, keep)
+    return dict(datas, series=series)
+
+
+def date_range(start_date, end_date):
     # Note: https://stackoverflow.com/questions/4676195/why-do-i-need-to-multiply-unix-timestamps-by-1000-in-javascript
     start_date = (
         datetime.strptime(start_date, "%Y-%m-%d").timestamp() * 1000
@@ -51,119 +310,146 @@ def filter_datas(start_date, end_date, datas):
         datetime.strptime(end_date, "%Y-%m-%d")
         if end_date is not None
         else datetime.now()
-    ).replace(hour=23, minute=59, second=59).timestamp() * 1000
+    ).replace(hour=23, minute=59, second=59, microsecond=0).timestamp() * 1000
+    return start_date, end_date
 
-    original_series = datas["series"]
 
-    if "series" in datas:
-        df = pd.DataFrame(datas["series"])
-        df["datetime"] = pd.to_datetime(df.x // 1000, unit="s")
+def filter_datas(start_date, end_date, datas: IndexedDatas):
+    start_date, end_date = date_range(start_date, end_date)
 
-        df = df[(df.x >= start_date) & (df.x <= end_date)]
-
-        datas["series"] = (
-            df.drop(columns="datetime")
-            .sort_values(by=["x", "y"], ascending=True)
-            .to_dict("records")
-        )
-    else:
-        datas["series"] = []
+    series = datas.series_between(start_date, end_date)
 
     # If no data is found within the timeframe, that usually means the streamer hasn't streamed within that timeframe
     # We create a series that shows up as a straight line on the dashboard, with 'No Stream' as labels
-    if len(datas["series"]) == 0:
-        new_end_date = start_date
-        new_start_date = 0
-        df = pd.DataFrame(original_series)
-        df["datetime"] = pd.to_datetime(df.x // 1000, unit="s")
-
+    if series == []:
         # Attempt to get the last known balance from before the provided timeframe
-        df = df[(df.x >= new_start_date) & (df.x <= new_end_date)]
-        last_balance = df.drop(columns="datetime").sort_values(
-            by=["x", "y"], ascending=True).to_dict("records")[-1]['y']
+        previous = datas.last_point_before(start_date)
+        if previous is not None:
+            last_balance = previous["y"]
+            series = [
+                {"x": start_date, "y": last_balance, "z": "No Stream"},
+                {"x": end_date, "y": last_balance, "z": "No Stream"},
+            ]
 
-        datas["series"] = [{'x': start_date, 'y': last_balance, 'z': 'No Stream'}, {
-            'x': end_date, 'y': last_balance, 'z': 'No Stream'}]
+    return {
+        "series": series,
+        "annotations": datas.annotations_between(start_date, end_date),
+    }
 
-    if "annotations" in datas:
-        df = pd.DataFrame(datas["annotations"])
-        df["datetime"] = pd.to_datetime(df.x // 1000, unit="s")
 
-        df = df[(df.x >= start_date) & (df.x <= end_date)]
+# The cursor is the timestamp of the last record sent to the client (0 if nothing was sent)
+def get_cursor(start_date, end_date, datas: IndexedDatas):
+    return datas.last_x(*date_range(start_date, end_date))
 
-        datas["annotations"] = (
-            df.drop(columns="datetime")
-            .sort_values(by="x", ascending=True)
-            .to_dict("records")
-        )
+
+# Only the records saved since the cursor, the dashboard merges them with the datas already loaded.
+# x >= since: a record saved after the previous response can have the timestamp of the cursor,
+# the dashboard skips the records at that timestamp it already has
+def read_delta(streamer, since, start_date, end_date):
+    start, end = date_range(start_date, end_date)
+    if Settings.analytics_store.range_queries is True:
+        # Don't pollute the cache with a new range on each refresh
+        datas = Settings.analytics_store.read(streamer, max(start, since), end)
+        datas = None if datas is None else IndexedDatas(datas)
     else:
-        datas["annotations"] = []
+        datas = analytics_cache.read(streamer)
+    if datas is None:
+        return None
 
-    return datas
+    start = max(start, since)
+    return {
+        "series": datas.series_between(start, end),
+        "annotations": datas.annotations_between(start, end),
+        "cursor": max(since, get_cursor(start_date, end_date, datas)),
+    }
 
 
 def read_json(streamer, return_response=True):
     start_date = request.args.get("startDate", type=str)
     end_date = request.args.get("endDate", type=str)
-
-    path = Settings.analytics_path
-    streamer = streamer if streamer.endswith(".json") else f"{streamer}.json"
-
-    # Check if the file exists before attempting to read it
-    if not os.path.exists(os.path.join(path, streamer)):
-        error_message = f"File '{streamer}' not found."
+    since = request.args.get("since", type=int)
+    # Downsampling: bucket size in minutes and/or max number of points of the series
+    resolution = request.args.get("resolution", type=int)
+    max_points = request.args.get("max_points", type=int)
+
+    # Old dashboards use the file name as streamer name
+    streamer = streamer[: -len(".json")] if streamer.endswith(".json") else streamer
+
+    # Check if the streamer exists before attempting to filter the data
+    version = Settings.analytics_store.version(streamer)
+    if version is None:
+        error_message = f"Analytics for '{streamer}' not found."
         logger.error(error_message)
         if return_response:
-            return Response(json.dumps({"error": error_message}), status=404, mimetype="application/json")
+            return Response(
+                json.dumps({"error": error_message}),
+                status=404,
+                mimetype="application/json",
+            )
         else:
             return {"error": error_message}
 
-    try:
-        with open(os.path.join(path, streamer), 'r') as file:
-            data = json.load(file)
-    except json.JSONDecodeError as e:
-        error_message = f"Error decoding JSON in file '{streamer}': {str(e)}"
-        logger.error(error_message)
-        if return_response:
-            return Response(json.dumps({"error": error_message}), status=500, mimetype="application/json")
-        else:
-            return {"error": error_message}
+    def build():
+        if since is not None:
+            return read_delta(streamer, since, start_date, end_date)
+
+        # The store could return more points than requested (e.g. the last balance before start_date)
+        data = analytics_cache.read(streamer, *date_range(start_date, end_date))
+
+        def compute():
+            # Handle filtering data, if applicable
+            filtered_data = filter_datas(start_date, end_date, data)
+            filtered_data = downsample(filtered_data, resolution, max_points)
+            filtered_data["cursor"] = get_cursor(start_date, end_date, data)
+            return filtered_data
+
+        return analytics_cache.result(
+            (streamer, *date_range(start_date, end_date), resolution, max_points),
+            compute,
+        )
 
-    # Handle filtering data, if applicable
-    filtered_data = filter_datas(start_date, end_date, data)
     if return_response:
-        return Response(json.dumps(filtered_data), status=200, mimetype="application/json")
+        return json_response(
+            (
+                "json",
+                streamer,
+                version,
+                *date_range(start_date, end_date),
+                since,
+                resolution,
+                max_points,
+            ),
+            build,
+        )
     else:
-        return filtered_data
+        return build()
 
 
 def get_challenge_points(streamer):
-    datas = read_json(streamer, return_response=False)
-    if "series" in datas and datas["series"]:
-        return datas["series"][-1]["y"]
-    return 0  # Default value when 'series' key is not found or empty
+    return analytics_cache.summary(streamer)["points"]
 
 
 def get_last_activity(streamer):
-    datas = read_json(streamer, return_response=False)
-    if "series" in datas and datas["series"]:
-        return datas["series"][-1]["x"]
-    return 0  # Default value when 'series' key is not found or empty
+    return analytics_cache.summary(streamer)["last_activity"]
 
 
 def json_all():
-    return Response(
-        json.dumps(
-            [
-                {
-                    "name": streamer.strip(".json"),
-                    "data": read_json(streamer, return_response=False),
-                }
-                for streamer in streamers_available()
-            ]
+    versions = streamers_versions()
+    return json_response(
+        (
+            "json_all",
+            versions,
+            # The default end date is today
+            date_range(request.args.get("startDate"), request.args.get("endDate")),
+            sorted(request.args.items()),
         ),
-        status=200,
-        mimetype="application/json",
+        lambda: [
+            {
+                "name": streamer,
+                "data": read_json(streamer, return_response=False),
+            }
+            for streamer, _ in versions
+        ],
     )
 
 
@@ -176,19 +462,25 @@ def index(refresh=5, days_ago=7):
 
 
 def streamers():
-    return Response(
-        json.dumps(
-            [
-                {"name": s, "points": get_challenge_points(
-                    s), "last_activity": get_last_activity(s)}
-                for s in sorted(streamers_available())
-            ]
-        ),
-        status=200,
-        mimetype="application/json",
+    versions = streamers_versions()
+    return json_response(
+        ("streamers", versions),
+        lambda: [
+            {
+                "name": s,
+                "points": get_challenge_points(s),
+                "last_activity": get_last_activity(s),
+            }
+            for s, _ in versions
+        ],
     )
 
 
+# Prometheus text format, see classes/Metrics.py
+def metrics():
+    return Response(registry.render(), status=200, content_type=METRICS_CONTENT_TYPE)
+
+
 def download_assets(assets_folder, required_files):
     Path(assets_folder).mkdir(parents=True, exist_ok=True)
     logger.info(f"Downloading assets to {assets_folder}")
@@ -196,8 +488,7 @@ def download_assets(assets_folder, required_files):
     for f in required_files:
         if os.path.isfile(os.path.join(assets_folder, f)) is False:
             if (
-                download_file(os.path.join("assets", f),
-                              os.path.join(assets_folder, f))
+                download_file(os.path.join("assets", f), os.path.join(assets_folder, f))
                 is True
             ):
                 logger.info(f"Downloaded {f}")
@@ -222,7 +513,35 @@ def check_assets():
                 download_assets(assets_folder, required_files)
                 break
 
-last_sent_log_index = 0
+
+# Read the log file from offset (bytes), without reading what the client already has.
+# file_id is the inode of the file read by the client: if it has changed (or the file is
+# shorter than offset) the file has been rotated and we restart from the beginning.
+# Without offset (first request) only the last max_bytes are returned
+def read_log(log_file_path, offset=None, file_id=None, max_bytes=256 * 1024):
+    with open(log_file_path, "rb") as log_file:
+        stat = os.fstat(log_file.fileno())
+        skip_partial_line = False
+        if offset is None:
+            offset = max(0, stat.st_size - max_bytes)
+            skip_partial_line = offset > 0
+        elif (file_id is not None and file_id != stat.st_ino) or offset > stat.st_size:
+            offset = 0
+
+        log_file.seek(offset)
+        content = log_file.read(min(stat.st_size - offset, max_bytes))
+
+    start = content.find(b"\n") + 1 if skip_partial_line is True else 0
+    # Send only the complete lines, the last one could be still in writing
+    end = content.rfind(b"\n") + 1
+    if end <= start:
+        return "", offset + start, stat.st_ino
+    return (
+        content[start:end].decode("utf-8", errors="replace"),
+        offset + end,
+        stat.st_ino,
+    )
+
 
 class AnalyticsServer(Thread):
     def __init__(
@@ -231,7 +550,12 @@ class AnalyticsServer(Thread):
         port: int = 5000,
         refresh: int = 5,
         days_ago: int = 7,
-        username: str = None
+        username: str = None,
+        logs_file: str = None,
+        queue_listener=None,
+        workers: int = None,
+        max_log_streams: int = None,
+        log_stream_lifetime: int = 300,
     ):
         super(AnalyticsServer, self).__init__()
 
@@ -242,27 +566,106 @@ class AnalyticsServer(Thread):
         self.refresh = refresh
         self.days_ago = days_ago
         self.username = username
+        # Size of the thread pool of the production server (waitress), None = Flask server
+        self.workers = workers
+        # Each /log/stream client holds a worker: keep at least half of them for the dashboard
+        self.max_log_streams = (
+            max_log_streams
+            if max_log_streams is not None
+            else (4 if workers is None else max(1, workers // 2))
+        )
+        self.log_stream_lifetime = log_stream_lifetime
+        log_streams = {"count": 0}
+        log_streams_mutex = Lock()
+
+        log_file_path = (
+            logs_file
+            if logs_file is not None
+            else os.path.join(Path().absolute(), "logs", f"{username}.log")
+        )
+        log_broadcaster = (
+            attach_log_broadcaster(queue_listener)
+            if queue_listener is not None
+            else None
+        )
 
         def generate_log():
-            global last_sent_log_index  # Use the global variable
-
-            # Get the last received log index from the client request parameters
-            last_received_index = int(request.args.get("lastIndex", last_sent_log_index))
-
-            logs_path = os.path.join(Path().absolute(), "logs")
-            log_file_path = os.path.join(logs_path, f"{username}.log")
+            # Each client sends the offset (and the file id) received with the previous response
+            offset = request.args.get("offset", type=int)
+            if offset is None:
+                # Old dashboards
+                offset = request.args.get("lastIndex", type=int)
+            file_id = request.args.get("file", type=int)
             try:
-                with open(log_file_path, "r") as log_file:
-                    log_content = log_file.read()
-
-                # Extract new log entries since the last received index
-                new_log_entries = log_content[last_received_index:]
-                last_sent_log_index = len(log_content)  # Update the last sent index
-
-                return Response(new_log_entries, status=200, mimetype="text/plain")
-
+                content, offset, file_id = read_log(log_file_path, offset, file_id)
             except FileNotFoundError:
-                return Response("Log file not found.", status=404, mimetype="text/plain")
+                return Response(
+                    "Log file not found.", status=404, mimetype="text/plain"
+                )
+
+            return Response(
+                content,
+                status=200,
+                mimetype="text/plain",
+                headers={"X-Log-Offset": str(offset), "X-Log-File": str(file_id)},
+            )
+
+        # Server-Sent Events, a line is sent as soon as it's logged.
+        # At most max_log_streams streams at the same time, each one ends after
+        # log_stream_lifetime seconds: EventSource reconnects after the retry: delay
+        def stream_log():
+            if log_broadcaster is None:
+                return Response(
+                    "Log stream not available.", status=404, mimetype="text/plain"
+                )
+
+            with log_streams_mutex:
+                accepted = log_streams["count"] < self.max_log_streams
+                if accepted is True:
+                    log_streams["count"] += 1
+
+            def release():
+                with log_streams_mutex:
+                    log_streams["count"] -= 1
+
+            def events():
+                subscriber = log_broadcaster.subscribe()
+                deadline = time.time() + self.log_stream_lifetime
+                try:
+                    while time.time() < deadline:
+                        try:
+                            line = subscriber.get(
+                                timeout=min(15, max(0, deadline - time.time()))
+                            )
+                        except queue.Empty:
+                            # Keep-alive, the write fails if the client is gone
+                            yield ": keep-alive\n\n"
+                            continue
+                        yield "".join(
+                            f"data: {data}\n" for data in line.split("\n")
+                        ) + "\n"
+                    yield "retry: 1000\n\n"
+                finally:
+                    log_broadcaster.unsubscribe(subscriber)
+
+            if accepted is False:
+                # Too many streams: try again later, don't hold a worker
+                return Response(
+                    "retry: 30000\n\n",
+                    status=200,
+                    mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache"},
+                )
+
+            response = Response(
+                events(),
+                status=200,
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache"},
+            )
+            # Also called if the client is gone before the first event
+            response.call_on_close(release)
+            return response
 
         self.app = Flask(
             __name__,
@@ -276,20 +679,82 @@ class AnalyticsServer(Thread):
             defaults={"refresh": refresh, "days_ago": days_ago},
             methods=["GET"],
         )
-        self.app.add_url_rule("/streamers", "streamers",
-                              streamers, methods=["GET"])
+        self.app.add_url_rule("/streamers", "streamers", streamers, methods=["GET"])
         self.app.add_url_rule(
             "/json/<string:streamer>", "json", read_json, methods=["GET"]
         )
-        self.app.add_url_rule("/json_all", "json_all",
-                              json_all, methods=["GET"])
-        self.app.add_url_rule(
-            "/log", "log", generate_log, methods=["GET"])
+        self.app.add_url_rule("/json_all", "json_all", json_all, methods=["GET"])
+        self.app.add_url_rule("/log", "log", generate_log, methods=["GET"])
+        self.app.add_url_rule("/log/stream", "log_stream", stream_log, methods=["GET"])
+        self.app.add_url_rule("/metrics", "metrics", metrics, methods=["GET"])
 
     def run(self):
         logger.info(
             f"Analytics running on http://{self.host}:{self.port}/",
             extra={"emoji": ":globe_with_meridians:"},
         )
-        self.app.run(host=self.host, port=self.port,
-                     threaded=True, debug=False)
+        if self.workers is not None:
+            try:
+                from waitress import serve
+            except ImportError:
+                logger.warning(
+                    "Can't use a production server for the analytics, please install waitress (pip install waitress)"
+                )
+            else:
+                # At most self.workers requests are served at the same time, the others wait in the queue
+                serve(self.app, host=self.host, port=self.port, threads=self.workers)
+                return
+
+        self.app.run(host=self.host, port=self.port, threaded=True, debug=False)
+
+
+# Run the analytics server in its own process, the dashboard doesn't share the GIL with the miner:
+# python -m TwitchChannelPointsMiner.classes.AnalyticsServer --username your-twitch-username
+# The datas are read from the same analytics store, in the current directory
+def main():
+    parser = argparse.ArgumentParser(description="Analytics web-server")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--refresh", type=int, default=5)
+    parser.add_argument("--days-ago", type=int, default=7)
+    parser.add_argument(
+        "--backend",
+        choices=[backend.name for backend in AnalyticsBackend],
+        default=AnalyticsBackend.JSON_LINES.name,
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--logs-file", default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - [%(funcName)s]: %(message)s",
+        datefmt="%d/%m/%y %H:%M:%S",
+    )
+
+    Settings.enable_analytics = True
+    Settings.analytics_path = os.path.join(
+        Path().absolute(), "analytics", args.username
+    )
+    Path(Settings.analytics_path).mkdir(parents=True, exist_ok=True)
+    # The miner writes (and compacts) the store, this process only reads it
+    Settings.analytics_store = (
+        SqliteAnalyticsStore(Settings.analytics_path, read_only=True)
+        if args.backend == AnalyticsBackend.SQLITE.name
+        else AnalyticsStore(Settings.analytics_path, read_only=True)
+    )
+
+    AnalyticsServer(
+        host=args.host,
+        port=args.port,
+        refresh=args.refresh,
+        days_ago=args.days_ago,
+        username=args.username,
+        logs_file=args.logs_file,
+        workers=args.workers,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
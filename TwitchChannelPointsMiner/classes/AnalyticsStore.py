@@ -0,0 +1,333 @@
+import json
+import logging
+import os
+import sqlite3
+from collections import defaultdict
+from threading import Lock, local
+
+logger = logging.getLogger(__name__)
+
+
+# Append-only storage for the analytics.
+# One JSON Lines file per streamer (<streamer>.jsonl), each line is a single record:
+#   {"series": {"x": 1672527600000, "y": 1500, "z": "Watch"}}
+#   {"annotations": {"x": 1672527600000, "borderColor": "#45c1ff", "label": {...}}}
+# Saving a new point costs one write at the end of the file instead of a full rewrite.
+class AnalyticsStore(object):
+    __slots__ = ["path", "read_only", "locks", "mutex"]
+
+    extension = ".jsonl"
+    # read() ignores start and end
+    range_queries = False
+
+    # read_only=True in another process than the miner (the dashboard of analytics(separate_process=True)):
+    # the locks don't work between processes, only the miner may rewrite the files
+    def __init__(self, path, read_only: bool = False):
+        self.path = path
+        self.read_only = read_only
+        self.locks = defaultdict(Lock)
+        self.mutex = Lock()
+        if read_only is False:
+            self.migrate()
+
+    def __lock(self, streamer):
+        with self.mutex:
+            return self.locks[streamer]
+
+    def fname(self, streamer):
+        return os.path.join(self.path, f"{streamer}{self.extension}")
+
+    def streamers(self):
+        return [
+            f[: -len(self.extension)]
+            for f in os.listdir(self.path)
+            if os.path.isfile(os.path.join(self.path, f)) and f.endswith(self.extension)
+        ]
+
+    def exists(self, streamer):
+        return os.path.isfile(self.fname(streamer))
+
+    # Used as cache key by the readers, change on each append
+    def version(self, streamer):
+        try:
+            stat = os.stat(self.fname(streamer))
+            return (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return None
+
+    def append(self, streamer, key, data):
+        self.append_many(streamer, [(key, data)])
+
+    def append_many(self, streamer, records):
+        lines = "".join(
+            json.dumps({key: data}, separators=(",", ":")) + "\n"
+            for key, data in records
+        )
+        with self.__lock(streamer):
+            with open(self.fname(streamer), "a+b") as f:
+                # Don't glue the new records to a truncated last line
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        lines = "\n" + lines
+                f.write(lines.encode("utf-8"))
+
+    # The whole file is returned, start and end are ignored: the caller filters the datas
+    def read(self, streamer, start=None, end=None):
+        if self.exists(streamer) is False:
+            return None
+
+        with self.__lock(streamer):
+            datas, corrupted = self.__parse(streamer)
+            # Read only: skip the corrupted lines, the last one may be an append in progress
+            if corrupted > 0 and self.read_only is False:
+                logger.warning(
+                    f"Found {corrupted} corrupted lines in {self.fname(streamer)}, compacting the file"
+                )
+                # Same lock hold: no record can be appended between the read and the rewrite
+                self.__rewrite(streamer, datas)
+        return datas
+
+    def __parse(self, streamer):
+        datas = {"series": [], "annotations": []}
+        corrupted = 0
+        with open(self.fname(streamer), "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    for key in record:
+                        datas.setdefault(key, []).append(record[key])
+                except ValueError:
+                    # Usually a truncated line after a crash
+                    corrupted += 1
+        return datas, corrupted
+
+    # The records are appended in chronological order: read the file backwards
+    # from the end until we find the last point of the series
+    def last_point(self, streamer, chunk_size=4096):
+        try:
+            with open(self.fname(streamer), "rb") as f:
+                f.seek(0, os.SEEK_END)
+                position = f.tell()
+                tail = b""
+                while position > 0:
+                    read_size = min(chunk_size, position)
+                    position -= read_size
+                    f.seek(position)
+                    lines = (f.read(read_size) + tail).split(b"\n")
+                    # The first line could be incomplete, keep it for the next iteration
+                    tail = lines.pop(0) if position > 0 else b""
+                    for line in reversed(lines):
+                        if line.startswith(b'{"series"'):
+                            try:
+                                return json.loads(line)["series"]
+                            except ValueError:
+                                continue
+        except FileNotFoundError:
+            pass
+        return None
+
+    # Rewrite the file (sorted by timestamp), without the corrupted lines
+    def compact(self, streamer, datas=None):
+        if self.read_only is True:
+            return
+        with self.__lock(streamer):
+            if datas is None:
+                if self.exists(streamer) is False:
+                    return
+                # Read under the lock, with the records appended until now
+                datas, _ = self.__parse(streamer)
+            self.__rewrite(streamer, datas)
+
+    # The caller holds the lock of the streamer
+    def __rewrite(self, streamer, datas):
+        records = sorted(
+            [(item["x"], key, item) for key in datas for item in datas[key]],
+            key=lambda record: record[0],
+        )
+        fname = self.fname(streamer)
+        temp_fname = fname + ".temp"
+        with open(temp_fname, "w") as temp_file:
+            for _, key, item in records:
+                temp_file.write(json.dumps({key: item}, separators=(",", ":")) + "\n")
+        os.replace(temp_fname, fname)
+
+    # Convert the old <streamer>.json files (full JSON document) to the new format
+    def migrate(self):
+        for f in os.listdir(self.path):
+            if f.endswith(".json") is False:
+                continue
+            streamer = f[: -len(".json")]
+            legacy_fname = os.path.join(self.path, f)
+            if self.exists(streamer) is True:
+                logger.warning(
+                    f"Both {legacy_fname} and {self.fname(streamer)} exist, skip the migration"
+                )
+                continue
+            try:
+                with open(legacy_fname, "r") as legacy_file:
+                    datas = json.load(legacy_file)
+            except ValueError as e:
+                logger.error(f"Unable to migrate {legacy_fname}: {e}")
+                continue
+
+            self.compact(
+                streamer,
+                {
+                    "series": datas.get("series", []),
+                    "annotations": datas.get("annotations", []),
+                },
+            )
+            # Keep a backup of the old file, it's not used anymore
+            os.replace(legacy_fname, legacy_fname + ".old")
+            logger.info(f"Migrated analytics of {streamer} to {self.fname(streamer)}")
+
+
+# SQLite storage for the analytics, one database per account (analytics/<username>/analytics.db).
+# Both the tables are indexed on (streamer, x), so a date range is an index range scan
+class SqliteAnalyticsStore(object):
+    __slots__ = ["path", "fname", "connections"]
+
+    range_queries = True
+
+    # read_only=True: don't import the JSON Lines files, only the miner does
+    def __init__(self, path, read_only: bool = False):
+        self.path = path
+        self.fname = os.path.join(path, "analytics.db")
+        # sqlite3 connections can't be shared between threads
+        self.connections = local()
+        with self.__connection() as connection:
+            connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS streamers (
+                    name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS series (
+                    streamer TEXT NOT NULL, x INTEGER NOT NULL, y INTEGER, z TEXT
+                );
+                CREATE INDEX IF NOT EXISTS series_streamer_x ON series (streamer, x);
+                CREATE TABLE IF NOT EXISTS annotations (
+                    streamer TEXT NOT NULL, x INTEGER NOT NULL, data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS annotations_streamer_x ON annotations (streamer, x);
+                """
+            )
+        if read_only is False:
+            self.migrate()
+
+    def __connection(self):
+        if getattr(self.connections, "connection", None) is None:
+            connection = sqlite3.connect(self.fname, timeout=30)
+            # Readers (dashboard) don't block the writer and vice versa
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.connections.connection = connection
+        return self.connections.connection
+
+    def streamers(self):
+        return [
+            row[0] for row in self.__connection().execute("SELECT name FROM streamers")
+        ]
+
+    def exists(self, streamer):
+        return self.version(streamer) is not None
+
+    # Used as cache key by the readers, change on each append
+    def version(self, streamer):
+        row = (
+            self.__connection()
+            .execute("SELECT version FROM streamers WHERE name = ?", (streamer,))
+            .fetchone()
+        )
+        return None if row is None else row[0]
+
+    def append(self, streamer, key, data):
+        self.append_many(streamer, [(key, data)])
+
+    def append_many(self, streamer, records):
+        series = [
+            (streamer, data["x"], data.get("y"), data.get("z"))
+            for key, data in records
+            if key == "series"
+        ]
+        annotations = [
+            (
+                streamer,
+                data["x"],
+                json.dumps(
+                    {k: v for k, v in data.items() if k != "x"}, separators=(",", ":")
+                ),
+            )
+            for key, data in records
+            if key == "annotations"
+        ]
+        try:
+            with self.__connection() as connection:
+                connection.executemany(
+                    "INSERT INTO series (streamer, x, y, z) VALUES (?, ?, ?, ?)",
+                    series,
+                )
+                connection.executemany(
+                    "INSERT INTO annotations (streamer, x, data) VALUES (?, ?, ?)",
+                    annotations,
+                )
+                connection.execute(
+                    "INSERT OR IGNORE INTO streamers (name) VALUES (?)", (streamer,)
+                )
+                connection.execute(
+                    "UPDATE streamers SET version = version + 1 WHERE name = ?",
+                    (streamer,),
+                )
+        # Same contract as the JSON Lines store: a failed write raises OSError
+        except sqlite3.Error as e:
+            raise OSError(f"{self.fname}: {e}") from e
+
+    # Return the datas between start and end (milliseconds)
+    # plus the last point of the series before start: the last known balance
+    def read(self, streamer, start=None, end=None):
+        if self.exists(streamer) is False:
+            return None
+
+        start = 0 if start is None else start
+        end = 2**63 - 1 if end is None else end
+        connection = self.__connection()
+        series = connection.execute(
+            "SELECT x, y, z FROM ("
+            "  SELECT x, y, z FROM series WHERE streamer = ? AND x < ? ORDER BY x DESC LIMIT 1"
+            ") UNION ALL "
+            "SELECT x, y, z FROM series WHERE streamer = ? AND x BETWEEN ? AND ? ORDER BY x",
+            (streamer, start, streamer, start, end),
+        ).fetchall()
+        annotations = connection.execute(
+            "SELECT x, data FROM annotations WHERE streamer = ? AND x BETWEEN ? AND ? ORDER BY x",
+            (streamer, start, end),
+        ).fetchall()
+        return {
+            "series": [{"x": x, "y": y, "z": z} for x, y, z in series],
+            "annotations": [dict(json.loads(data), x=x) for x, data in annotations],
+        }
+
+    def last_point(self, streamer):
+        row = (
+            self.__connection()
+            .execute(
+                "SELECT x, y, z FROM series WHERE streamer = ? ORDER BY x DESC LIMIT 1",
+                (streamer,),
+            )
+            .fetchone()
+        )
+        return None if row is None else {"x": row[0], "y": row[1], "z": row[2]}
+
+    # Import the streamers saved with the JSON Lines store (or the old .json files)
+    def migrate(self):
+        json_store = AnalyticsStore(self.path)
+        known = set(self.streamers())
+        for streamer in json_store.streamers():
+            if streamer in known:
+                continue
+            datas = json_store.read(streamer)
+            self.append_many(
+                streamer,
+                [("series", item) for item in datas["series"]]
+                + [("annotations", item) for item in datas["annotations"]],
+            )
+            logger.info(f"Imported analytics of {streamer} in {self.fname}")
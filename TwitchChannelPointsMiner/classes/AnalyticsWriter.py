@@ -0,0 +1,102 @@
+import logging
+import queue
+import time
+from collections import defaultdict
+from threading import Thread
+
+from TwitchChannelPointsMiner.classes.Profiler import timed
+
+logger = logging.getLogger(__name__)
+
+
+# Write-behind buffer for the analytics.
+# The WebSocket threads only put the records in a queue, this thread groups them by
+# streamer and writes them on the store every flush_size records or flush_interval seconds
+class AnalyticsWriter(Thread):
+    def __init__(
+        self,
+        store,
+        flush_size: int = 100,
+        flush_interval: float = 5,
+        max_pending: int = 100000,
+    ):
+        super(AnalyticsWriter, self).__init__()
+        self.daemon = True
+        self.name = "Analytics writer"
+
+        self.store = store
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        # While the store keeps failing, the oldest records are dropped beyond this
+        self.max_pending = max_pending
+
+        self.queue = queue.Queue()
+        self.pending = defaultdict(list)
+        self.pending_count = 0
+
+    def append(self, streamer, key, data):
+        self.queue.put((streamer, key, data))
+
+    def stop(self):
+        # None is the signal for flush and exit
+        self.queue.put(None)
+        if self.is_alive() is True:
+            self.join()
+
+    def run(self):
+        last_flush = time.time()
+        while True:
+            try:
+                item = self.queue.get(
+                    timeout=max(0, last_flush + self.flush_interval - time.time())
+                )
+            except queue.Empty:
+                item = False
+
+            if item is None:
+                self.flush()
+                break
+
+            if item is not False:
+                streamer, key, data = item
+                self.pending[streamer].append((key, data))
+                self.pending_count += 1
+
+            if (
+                self.pending_count >= self.flush_size
+                or time.time() - last_flush >= self.flush_interval
+            ):
+                self.flush()
+                last_flush = time.time()
+
+    def flush(self):
+        for streamer in list(self.pending):
+            try:
+                # The disk (or database) write, the Streamer only queues the records
+                with timed("analytics_write"):
+                    self.store.append_many(streamer, self.pending[streamer])
+            # Any backend error (OSError, sqlite3.Error...) must not kill the thread
+            except Exception as e:
+                # Keep the records, retry on the next flush
+                logger.error(
+                    f"Unable to save the analytics of {streamer}: {e}", exc_info=True
+                )
+                continue
+            self.pending_count -= len(self.pending[streamer])
+            del self.pending[streamer]
+
+        if self.pending_count > self.max_pending:
+            self.__drop_oldest(self.pending_count - self.max_pending)
+
+    # Bounded memory if the store never recovers: drop the oldest records first
+    def __drop_oldest(self, count):
+        logger.warning(f"Analytics store unavailable, {count} records dropped")
+        for streamer in list(self.pending):
+            dropped = min(count, len(self.pending[streamer]))
+            del self.pending[streamer][:dropped]
+            self.pending_count -= dropped
+            count -= dropped
+            if not self.pending[streamer]:
+                del self.pending[streamer]
+            if count <= 0:
+                break
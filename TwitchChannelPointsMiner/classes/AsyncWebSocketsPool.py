@@ -0,0 +1,269 @@
+import asyncio
+import json
+import logging
+import random
+import re
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+
+from TwitchChannelPointsMiner.classes.Metrics import WEBSOCKET_RECONNECTS
+from TwitchChannelPointsMiner.classes.Settings import Settings
+from TwitchChannelPointsMiner.classes.TwitchWebSocket import TwitchWebSocket
+from TwitchChannelPointsMiner.classes.WebSocketsPool import WebSocketsPool
+from TwitchChannelPointsMiner.constants import WEBSOCKET
+from TwitchChannelPointsMiner.utils import internet_connection_available
+
+# Optional, required by the asyncio engine (pip install websockets)
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+logger = logging.getLogger(__name__)
+
+
+# A PubSub connection driven by the event loop of AsyncWebSocketsPool.
+# Same attributes as TwitchWebSocket: the WebSocketsPool handlers work with both
+class AsyncTwitchWebSocket(object):
+    __slots__ = [
+        "index",
+        "parent_pool",
+        "url",
+        "is_closed",
+        "is_opened",
+        "is_reconnecting",
+        "forced_close",
+        "replaces",
+        "topics",
+        "pending_topics",
+        "listen_requests",
+        "twitch",
+        "streamers",
+        "events_predictions",
+        "last_pong",
+        "last_ping",
+        "connection",
+        "outgoing",
+    ]
+
+    # Same protocol as the threaded connection, only send() differs
+    listen = TwitchWebSocket.listen
+    ping = TwitchWebSocket.ping
+    elapsed_last_pong = TwitchWebSocket.elapsed_last_pong
+    elapsed_last_ping = TwitchWebSocket.elapsed_last_ping
+
+    def __init__(self, index, parent_pool, url):
+        self.index = index
+        self.parent_pool = parent_pool
+        self.url = url
+
+        self.is_closed = False
+        self.is_opened = False
+        self.is_reconnecting = False
+        self.forced_close = False
+        # Always None: the connection is reopened in place, without overlap
+        self.replaces = None
+
+        self.topics = []
+        self.pending_topics = []
+        self.listen_requests = {}
+
+        self.twitch = parent_pool.twitch
+        self.streamers = parent_pool.streamers
+        self.events_predictions = parent_pool.events_predictions
+
+        self.last_pong = time.time()
+        self.last_ping = time.time()
+
+        self.connection = None
+        # Frames waiting to be sent on the current connection (dropped on reconnection)
+        self.outgoing = None
+
+    # Thread safe: the frames are written by the event loop
+    def send(self, request):
+        request_str = json.dumps(request, separators=(",", ":"))
+        logger.debug(f"#{self.index} - Send: {request_str}")
+        self.parent_pool.loop.call_soon_threadsafe(self.__enqueue, request_str)
+
+    def __enqueue(self, request_str):
+        if self.outgoing is not None:
+            self.outgoing.put_nowait(request_str)
+
+    def close(self):
+        self.parent_pool.loop.call_soon_threadsafe(self.__close)
+
+    def __close(self):
+        if self.connection is not None:
+            asyncio.ensure_future(self.connection.close())
+
+    # Connect, listen to all the topics and reconnect until end() is called
+    async def run(self):
+        failures = 0
+        while self.forced_close is False:
+            try:
+                async with websockets.connect(
+                    self.url, ping_interval=None, **self.__ssl()
+                ) as connection:
+                    failures = 0
+                    await self.__session(connection)
+            # Connection lost or refused, invalid handshake, timeout...
+            except Exception as e:
+                failures += 1
+                logger.error(f"#{self.index} - WebSocket error: {e}")
+            finally:
+                self.connection = None
+                self.outgoing = None
+                self.is_opened = False
+                self.is_closed = True
+
+            if self.forced_close is True:
+                break
+            logger.info(f"#{self.index} - WebSocket closed")
+            self.is_reconnecting = True
+            WEBSOCKET_RECONNECTS.inc(self.index)
+
+            # Jittered exponential backoff on repeated failures: 1-3s, then up to ~5 minutes
+            delay = random.uniform(1, 3) * 2 ** min(failures, 7)
+            logger.info(
+                f"#{self.index} - Reconnecting to Twitch PubSub server in ~{round(delay)} seconds"
+            )
+            await asyncio.sleep(delay)
+            loop = asyncio.get_running_loop()
+            while (
+                await loop.run_in_executor(None, internet_connection_available) is False
+            ):
+                random_sleep = random.randint(1, 3)
+                logger.warning(
+                    f"#{self.index} - No internet connection available! Retry after {random_sleep}m"
+                )
+                await asyncio.sleep(random_sleep * 60)
+
+            # Listen again to all the topics once connected
+            self.pending_topics = list(self.topics)
+            self.listen_requests = {}
+
+    def __ssl(self):
+        if (
+            self.url.startswith("wss")
+            and Settings.disable_ssl_cert_verification is True
+        ):
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            return {"ssl": context}
+        return {}
+
+    async def __session(self, connection):
+        self.connection = connection
+        self.outgoing = asyncio.Queue()
+        self.is_closed = False
+        self.is_opened = True
+        self.is_reconnecting = False
+        self.last_pong = time.time()
+
+        self.ping()
+        pending_topics, self.pending_topics = self.pending_topics, []
+        self.listen(pending_topics, self.twitch.twitch_login.get_auth_token())
+
+        tasks = [
+            asyncio.ensure_future(self.__read(connection)),
+            asyncio.ensure_future(self.__write(connection)),
+            asyncio.ensure_future(self.__keepalive()),
+        ]
+        try:
+            # Any of them ends the session: connection closed or no PONG
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+        for task in done:
+            task.result()
+
+    async def __read(self, connection):
+        try:
+            async for message in connection:
+                self.parent_pool.dispatch(self, message)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def __write(self, connection):
+        while True:
+            await connection.send(await self.outgoing.get())
+
+    async def __keepalive(self):
+        while True:
+            await asyncio.sleep(random.uniform(25, 30))
+            if self.elapsed_last_pong() > 5:
+                logger.info(
+                    f"#{self.index} - The last PONG was received more than 5 minutes ago"
+                )
+                return
+            self.ping()
+
+
+# The topic of a MESSAGE frame, e.g. video-playback-by-id.<channel_id>
+TOPIC_REGEX = re.compile(r'"topic":\s*"([^"]+)"')
+
+
+# All the PubSub connections, pings and reconnections on one asyncio event loop.
+# The messages are handled by WebSocketsPool.on_message in a few dispatcher threads:
+# a slow handler (GQL request) blocks neither the connections nor the other channels.
+# The messages of a topic are always handled by the same thread, in order
+class AsyncWebSocketsPool(WebSocketsPool):
+    __slots__ = ["loop", "dispatchers"]
+
+    def __init__(self, twitch, streamers, events_predictions, dispatchers: int = 4):
+        super().__init__(twitch, streamers, events_predictions)
+        self.loop = asyncio.new_event_loop()
+        self.dispatchers = [
+            ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"PubSub dispatcher #{index}"
+            )
+            for index in range(0, dispatchers)
+        ]
+        thread = Thread(target=self.loop.run_forever)
+        thread.daemon = True
+        thread.name = "PubSub event loop"
+        thread.start()
+
+    def new_connection(self, index):
+        return AsyncTwitchWebSocket(index=index, parent_pool=self, url=WEBSOCKET)
+
+    def start_connection(self, index):
+        asyncio.run_coroutine_threadsafe(self.ws[index].run(), self.loop)
+
+    def dispatch(self, ws, message):
+        # PONG, RESPONSE, RECONNECT: ordered with the other frames of the connection
+        match = TOPIC_REGEX.search(message)
+        key = ws.index if match is None else match.group(1)
+        dispatcher = self.dispatchers[hash(key) % len(self.dispatchers)]
+        try:
+            dispatcher.submit(self.__on_message, ws, message)
+        except RuntimeError:
+            # end() was called, the frames still in flight are dropped
+            pass
+
+    @staticmethod
+    def __on_message(ws, message):
+        try:
+            WebSocketsPool.on_message(ws, message)
+        except Exception:
+            logger.error(
+                f"#{ws.index} - Error while handling: {message}", exc_info=True
+            )
+
+    # Close the connection, run() reconnects without blocking the caller
+    def handle_reconnection(self, ws):
+        if ws.is_reconnecting is False and ws.forced_close is False:
+            ws.is_reconnecting = True
+            ws.close()
+
+    def end(self):
+        for ws in self.ws:
+            ws.forced_close = True
+            ws.close()
+        # Drop the queued messages, don't wait for them at the interpreter exit
+        for dispatcher in self.dispatchers:
+            dispatcher.shutdown(wait=False, cancel_futures=True)
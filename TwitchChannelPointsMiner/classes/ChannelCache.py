@@ -0,0 +1,64 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+
+# On-disk cache of the streamers metadata: {username: {channel_id, display_name, spade_url, updated_at}}
+# The login -> channel_id mapping almost never changes, so we can skip the resolution on restart
+class ChannelCache(object):
+    __slots__ = ["fname", "ttl", "channels", "mutex"]
+
+    def __init__(self, username, ttl: int = 7 * 24 * 60 * 60):
+        cache_path = os.path.join(Path().absolute(), "cache", username)
+        Path(cache_path).mkdir(parents=True, exist_ok=True)
+        self.fname = os.path.join(cache_path, "channels.json")
+        self.ttl = ttl
+        self.channels = {}
+        self.mutex = Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.fname, "r") as f:
+                self.channels = json.load(f)
+        except FileNotFoundError:
+            self.channels = {}
+        except (ValueError, OSError) as e:
+            logger.warning(f"Unable to read the channels cache {self.fname}: {e}")
+            self.channels = {}
+
+    def save(self):
+        temp_fname = self.fname + ".temp"
+        with self.mutex:
+            with open(temp_fname, "w") as temp_file:
+                json.dump(self.channels, temp_file)
+            os.replace(temp_fname, self.fname)
+
+    def get(self, username):
+        channel = self.channels.get(username)
+        if channel is None or time.time() - channel.get("updated_at", 0) > self.ttl:
+            return None
+        return channel
+
+    def get_channel_id(self, username):
+        channel = self.get(username)
+        return None if channel is None else channel.get("channel_id")
+
+    def update(self, username, **values):
+        with self.mutex:
+            channel = self.channels.setdefault(username, {})
+            if "channel_id" in values:
+                channel["updated_at"] = time.time()
+            channel.update({k: v for k, v in values.items() if v is not None})
+
+    def invalidate(self, username):
+        with self.mutex:
+            if self.channels.pop(username, None) is None:
+                return
+        logger.debug(f"Remove {username} from the channels cache")
+        self.save()
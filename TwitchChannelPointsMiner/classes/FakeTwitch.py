@@ -0,0 +1,814 @@
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import random
+import signal
+import socketserver
+import struct
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+# Magic string of the WebSocket handshake (RFC 6455)
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+BUILD_ID = "6f0a2d3c-1b4e-4c5d-8e7f-9a0b1c2d3e4f"
+# PubSub topics with generated events, the others are only acknowledged
+GENERATED_TOPICS = [
+    "community-points-user-v1",
+    "video-playback-by-id",
+    "raid",
+    "community-moments-channel-v1",
+]
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+# Local stand-in for the Twitch endpoints used by the miner, only the standard library:
+#   - HTTP: channel page (client build id), settings.js (spade_url), spade, GQL, OAuth device flow
+#   - PubSub: WebSocket server (LISTEN/UNLISTEN/PING/PONG/RECONNECT/MESSAGE)
+#   - IRC: NICK/JOIN/PART/PING
+# The channels are channel0..channel<n-1>, all followed by the user.
+# Start it, then run the miner with the TWITCH_MINER_* variables of environment():
+#   python -m TwitchChannelPointsMiner.classes.FakeTwitch --channels 100 --event-rate 20
+class FakeTwitch(object):
+    __slots__ = [
+        "host",
+        "ports",
+        "username",
+        "user_id",
+        "event_rate",
+        "latency",
+        "jitter",
+        "error_rate",
+        "flap_rate",
+        "reconnect_interval",
+        "max_topics",
+        "random",
+        "channels",
+        "by_login",
+        "by_id",
+        "connections",
+        "subscriptions",
+        "stats",
+        "mutex",
+        "servers",
+        "running",
+    ]
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        pubsub_port: int = 0,
+        irc_port: int = 0,
+        username: str = "fakeuser",
+        channels: int = 10,
+        online_ratio: float = 0.5,
+        event_rate: float = 1.0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        flap_rate: float = 0.0,
+        reconnect_interval: float = None,
+        max_topics: int = 50,
+        seed: int = None,
+    ):
+        self.host = host
+        # Port 0: picked by the OS, updated by start()
+        self.ports = {"http": port, "pubsub": pubsub_port, "irc": irc_port}
+        self.username = username
+        self.user_id = "1000"
+        # PubSub events per second (all the connections together)
+        self.event_rate = event_rate
+        # Added to each HTTP response: latency + uniform(0, jitter) seconds
+        self.latency = latency
+        self.jitter = jitter
+        # Probability of a 500 response for a GQL request
+        self.error_rate = error_rate
+        # Probability of a stream-up/stream-down for a video-playback-by-id event
+        self.flap_rate = flap_rate
+        # Send RECONNECT to all the PubSub connections every reconnect_interval seconds
+        self.reconnect_interval = reconnect_interval
+        self.max_topics = max_topics
+        self.random = random.Random(seed)
+
+        self.channels = [
+            {
+                "id": str(2000 + index),
+                "login": f"channel{index}",
+                "online": self.random.random() < online_ratio,
+                "broadcast_id": str(40000000000 + index),
+                "viewers": self.random.randint(1, 50000),
+                "balance": self.random.randint(0, 100000),
+                "claim": None,
+                "minutes_watched": 0,
+            }
+            for index in range(channels)
+        ]
+        self.by_login = {channel["login"]: channel for channel in self.channels}
+        self.by_id = {channel["id"]: channel for channel in self.channels}
+
+        self.connections = []
+        # [(connection, topic)], only the topics of GENERATED_TOPICS
+        self.subscriptions = []
+        self.stats = Counter()
+        self.mutex = Lock()
+        self.servers = []
+        self.running = False
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.ports['http']}"
+
+    def logins(self):
+        return [channel["login"] for channel in self.channels]
+
+    def environment(self):
+        return {
+            "TWITCH_MINER_URL": self.url,
+            "TWITCH_MINER_GQL_URL": f"{self.url}/gql",
+            "TWITCH_MINER_GQL_INTEGRITY_URL": f"{self.url}/integrity",
+            "TWITCH_MINER_OAUTH_URL": f"{self.url}/oauth2",
+            "TWITCH_MINER_WEBSOCKET": f"ws://{self.host}:{self.ports['pubsub']}/v1",
+            "TWITCH_MINER_IRC": self.host,
+            "TWITCH_MINER_IRC_PORT": str(self.ports["irc"]),
+            "TWITCH_MINER_CONNECTIVITY_CHECK": f"{self.host}:{self.ports['http']}",
+        }
+
+    def start(self):
+        self.running = True
+        http_server = ThreadingHTTPServer((self.host, self.ports["http"]), HTTPHandler)
+        pubsub_server = TCPServer((self.host, self.ports["pubsub"]), PubSubHandler)
+        irc_server = TCPServer((self.host, self.ports["irc"]), IRCHandler)
+        for name, server in [
+            ("http", http_server),
+            ("pubsub", pubsub_server),
+            ("irc", irc_server),
+        ]:
+            server.daemon_threads = True
+            server.fake = self
+            self.ports[name] = server.server_address[1]
+            self.servers.append(server)
+            self.__thread(server.serve_forever, f"Fake Twitch {name}")
+
+        self.__thread(self.generate_events, "Fake Twitch events")
+        if self.reconnect_interval is not None:
+            self.__thread(self.send_reconnects, "Fake Twitch reconnects")
+        return self
+
+    def stop(self):
+        self.running = False
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.servers = []
+        with self.mutex:
+            connections = list(self.connections)
+        for connection in connections:
+            connection.close()
+
+    def __thread(self, target, name):
+        thread = Thread(target=target)
+        thread.daemon = True
+        thread.name = name
+        thread.start()
+
+    def count(self, key, amount=1):
+        with self.mutex:
+            self.stats[key] += amount
+
+    def delay(self):
+        if self.latency > 0 or self.jitter > 0:
+            time.sleep(self.latency + self.random.uniform(0, self.jitter))
+
+    # === HTTP === #
+    def page(self):
+        return (
+            "<html><head>"
+            f'<script>window.__twilightBuildID="{BUILD_ID}";</script>'
+            f'<script src="{self.url}/config/settings.{BUILD_ID[:8]}.js"></script>'
+            "</head></html>"
+        )
+
+    def settings_js(self):
+        return "window.__twilightSettings = " + json.dumps(
+            {"spade_url": f"{self.url}/spade"}, separators=(",", ":")
+        )
+
+    def spade(self, body):
+        self.count("spade")
+        try:
+            payload = parse_qs(body.decode("utf-8"))["data"][0]
+            events = json.loads(base64.b64decode(payload))
+            for event in events:
+                channel = self.by_id.get(str(event["properties"]["channel_id"]))
+                if channel is not None:
+                    channel["minutes_watched"] += 1
+        except (KeyError, ValueError, TypeError):
+            self.count("spade:invalid")
+
+    def oauth(self, path):
+        if path.endswith("/device"):
+            return {
+                "device_code": uuid.uuid4().hex,
+                "expires_in": 1800,
+                "interval": 1,
+                "user_code": "FAKECODE",
+                "verification_uri": f"{self.url}/activate",
+            }
+        return {
+            "access_token": uuid.uuid4().hex[:30],
+            "refresh_token": uuid.uuid4().hex[:30],
+            "scope": [],
+            "token_type": "bearer",
+        }
+
+    # === GQL === #
+    # Single operation or JSON array of operations
+    def gql(self, request):
+        if isinstance(request, list):
+            return [self.gql_operation(operation) for operation in request]
+        return self.gql_operation(request)
+
+    def gql_operation(self, operation):
+        name = operation.get("operationName")
+        variables = operation.get("variables") or {}
+        self.count(f"gql:{name}")
+        resolver = getattr(self, f"gql_{name}", None)
+        return {
+            "data": {} if resolver is None else resolver(variables),
+            "extensions": {"operationName": name},
+        }
+
+    def user(self, channel):
+        return {
+            "id": channel["id"],
+            "login": channel["login"],
+            "displayName": channel["login"].capitalize(),
+        }
+
+    def stream(self, channel):
+        if channel["online"] is False:
+            return None
+        return {
+            "id": channel["broadcast_id"],
+            "viewersCount": channel["viewers"],
+            "tags": [],
+        }
+
+    def gql_ReportMenuItem(self, variables):
+        login = variables.get("channelLogin")
+        if login == self.username:
+            return {
+                "user": {
+                    "id": self.user_id,
+                    "login": self.username,
+                    "displayName": self.username,
+                }
+            }
+        channel = self.by_login.get(login)
+        return {"user": None if channel is None else self.user(channel)}
+
+    def gql_VideoPlayerStreamInfoOverlayChannel(self, variables):
+        channel = self.by_login.get(variables.get("channel"))
+        if channel is None:
+            return {"user": None}
+        return {
+            "user": dict(
+                self.user(channel),
+                stream=self.stream(channel),
+                broadcastSettings={
+                    "id": channel["id"],
+                    "title": f"{channel['login']} stream",
+                    "game": {"id": "1", "name": "Fake", "displayName": "Fake"},
+                },
+            )
+        }
+
+    def gql_WithIsStreamLiveQuery(self, variables):
+        channel = self.by_id.get(str(variables.get("id")))
+        if channel is None:
+            return {"user": None}
+        return {"user": {"id": channel["id"], "stream": self.stream(channel)}}
+
+    def gql_ChannelPointsContext(self, variables):
+        channel = self.by_login.get(variables.get("channelLogin"))
+        if channel is None:
+            return {"community": None}
+        claim = channel["claim"]
+        return {
+            "community": {
+                "id": channel["id"],
+                "channel": {
+                    "id": channel["id"],
+                    "self": {
+                        "communityPoints": {
+                            "balance": channel["balance"],
+                            "activeMultipliers": [],
+                            "availableClaim": None if claim is None else {"id": claim},
+                        }
+                    },
+                },
+            }
+        }
+
+    def gql_ClaimCommunityPoints(self, variables):
+        channel = self.by_id.get(str(variables["input"]["channelID"]))
+        if channel is not None and channel["claim"] == variables["input"]["claimID"]:
+            channel["claim"] = None
+            channel["balance"] += 50
+        return {"claimCommunityPoints": {"claim": None, "error": None}}
+
+    def gql_ChannelFollows(self, variables):
+        start = int(variables.get("cursor") or 0)
+        end = start + int(variables.get("limit", 100))
+        return {
+            "user": {
+                "id": self.user_id,
+                "follows": {
+                    "edges": [
+                        {
+                            "cursor": str(index + 1),
+                            "node": {"login": self.channels[index]["login"]},
+                        }
+                        for index in range(start, min(end, len(self.channels)))
+                    ],
+                    "pageInfo": {"hasNextPage": end < len(self.channels)},
+                },
+            }
+        }
+
+    def gql_ModViewChannelQuery(self, variables):
+        return {"user": {"self": {"isModerator": False}}}
+
+    def gql_DropsHighlightService_AvailableDrops(self, variables):
+        return {
+            "channel": {"id": variables.get("channelID"), "viewerDropCampaigns": None}
+        }
+
+    def gql_Inventory(self, variables):
+        return {
+            "currentUser": {
+                "id": self.user_id,
+                "inventory": {"dropCampaignsInProgress": [], "gameEventDrops": []},
+            }
+        }
+
+    def gql_ViewerDropsDashboard(self, variables):
+        return {"currentUser": {"id": self.user_id, "dropCampaigns": []}}
+
+    def gql_DropCampaignDetails(self, variables):
+        return {"user": {"id": self.user_id, "dropCampaign": None}}
+
+    # === PUBSUB === #
+    def add_connection(self, connection):
+        with self.mutex:
+            self.connections.append(connection)
+            self.stats["pubsub:connections"] += 1
+
+    def remove_connection(self, connection):
+        with self.mutex:
+            if connection in self.connections:
+                self.connections.remove(connection)
+            self.subscriptions = [
+                (conn, topic)
+                for conn, topic in self.subscriptions
+                if conn is not connection
+            ]
+
+    def on_pubsub_request(self, connection, request):
+        request_type = request.get("type")
+        self.count(f"pubsub:{request_type}")
+        if request_type == "PING":
+            connection.send({"type": "PONG"})
+        elif request_type == "LISTEN":
+            topics = request.get("data", {}).get("topics", [])
+            error = ""
+            if len(connection.topics) + len(topics) > self.max_topics:
+                error = "ERR_BADMESSAGE"
+            elif not request.get("data", {}).get("auth_token") and any(
+                # The user topics (community-points-user-v1.<user_id>) need the token
+                topic.split(".")[0].endswith("-user-v1")
+                for topic in topics
+            ):
+                error = "ERR_BADAUTH"
+            else:
+                with self.mutex:
+                    for topic in topics:
+                        if topic in connection.topics:
+                            continue
+                        connection.topics.add(topic)
+                        self.stats["pubsub:topics"] += 1
+                        if topic.split(".")[0] in GENERATED_TOPICS:
+                            self.subscriptions.append((connection, topic))
+            connection.send(
+                {"type": "RESPONSE", "nonce": request.get("nonce", ""), "error": error}
+            )
+        elif request_type == "UNLISTEN":
+            topics = set(request.get("data", {}).get("topics", []))
+            with self.mutex:
+                connection.topics -= topics
+                self.subscriptions = [
+                    (conn, topic)
+                    for conn, topic in self.subscriptions
+                    if conn is not connection or topic not in topics
+                ]
+            connection.send(
+                {"type": "RESPONSE", "nonce": request.get("nonce", ""), "error": ""}
+            )
+
+    # Poisson process: exponential intervals between the events
+    def generate_events(self):
+        next_event = time.perf_counter()
+        while self.running is True:
+            if self.event_rate <= 0:
+                time.sleep(1)
+                next_event = time.perf_counter()
+                continue
+            next_event += self.random.expovariate(self.event_rate)
+            time.sleep(max(0, next_event - time.perf_counter()))
+            with self.mutex:
+                if self.subscriptions == []:
+                    continue
+                connection, topic = self.random.choice(self.subscriptions)
+            message = self.event(topic)
+            if message is not None:
+                try:
+                    connection.send(
+                        {
+                            "type": "MESSAGE",
+                            "data": {"topic": topic, "message": json.dumps(message)},
+                        }
+                    )
+                    self.count("pubsub:events")
+                except OSError:
+                    pass
+
+    def event(self, topic):
+        name, target = topic.split(".", 1)
+        if name == "community-points-user-v1":
+            online = [channel for channel in self.channels if channel["online"] is True]
+            if online == []:
+                return None
+            channel = self.random.choice(online)
+            if self.random.random() < 0.2:
+                channel["claim"] = str(uuid.uuid4())
+                return {
+                    "type": "claim-available",
+                    "data": {
+                        "timestamp": now_iso(),
+                        "claim": {
+                            "id": channel["claim"],
+                            "user_id": self.user_id,
+                            "channel_id": channel["id"],
+                        },
+                    },
+                }
+            gain = self.random.choice([10, 12, 50])
+            channel["balance"] += gain
+            return {
+                "type": "points-earned",
+                "data": {
+                    "timestamp": now_iso(),
+                    "channel_id": channel["id"],
+                    "point_gain": {
+                        "user_id": self.user_id,
+                        "channel_id": channel["id"],
+                        "total_points": gain,
+                        "baseline_points": gain,
+                        "reason_code": "CLAIM" if gain == 50 else "WATCH",
+                        "multipliers": [],
+                    },
+                    "balance": {
+                        "user_id": self.user_id,
+                        "channel_id": channel["id"],
+                        "balance": channel["balance"],
+                    },
+                },
+            }
+
+        channel = self.by_id.get(target)
+        if channel is None:
+            return None
+        if name == "video-playback-by-id":
+            if self.random.random() < self.flap_rate:
+                channel["online"] = not channel["online"]
+                return {
+                    "type": "stream-up" if channel["online"] else "stream-down",
+                    "server_time": time.time(),
+                    "play_delay": 0,
+                }
+            if channel["online"] is False:
+                return None
+            channel["viewers"] = max(
+                1, channel["viewers"] + self.random.randint(-10, 10)
+            )
+            return {
+                "type": "viewcount",
+                "server_time": time.time(),
+                "viewers": channel["viewers"],
+            }
+        if channel["online"] is False:
+            return None
+        if name == "raid":
+            target_channel = self.random.choice(self.channels)
+            return {
+                "type": "raid_update_v2",
+                "raid": {
+                    "id": str(uuid.uuid4()),
+                    "source_id": channel["id"],
+                    "target_id": target_channel["id"],
+                    "target_login": target_channel["login"],
+                    "target_display_name": target_channel["login"].capitalize(),
+                    "viewer_count": channel["viewers"],
+                },
+            }
+        if name == "community-moments-channel-v1":
+            return {
+                "type": "active",
+                "data": {
+                    "moment_id": str(uuid.uuid4()),
+                    "channel_id": channel["id"],
+                    "timestamp": now_iso(),
+                },
+            }
+        return None
+
+    def send_reconnects(self):
+        while self.running is True:
+            time.sleep(self.reconnect_interval)
+            with self.mutex:
+                connections = list(self.connections)
+            for connection in connections:
+                try:
+                    connection.send({"type": "RECONNECT"})
+                    self.count("pubsub:reconnects")
+                except OSError:
+                    pass
+
+
+class TCPServer(socketserver.ThreadingTCPServer):
+    # Restart on the same ports without waiting for TIME_WAIT
+    allow_reuse_address = True
+
+
+class HTTPHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real endpoints
+    protocol_version = "HTTP/1.1"
+
+    def reply(self, status, body=b"", content_type="application/json"):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body != b"":
+            self.wfile.write(body)
+
+    def do_GET(self):
+        fake = self.server.fake
+        fake.delay()
+        path = urlparse(self.path).path
+        if path.startswith("/config/settings"):
+            fake.count("http:settings")
+            self.reply(200, fake.settings_js(), "application/javascript")
+        else:
+            # Any other path is a channel page
+            fake.count("http:page")
+            self.reply(200, fake.page(), "text/html")
+
+    def do_POST(self):
+        fake = self.server.fake
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        fake.delay()
+        path = urlparse(self.path).path
+        if path == "/gql":
+            if fake.random.random() < fake.error_rate:
+                fake.count("gql:errors")
+                self.reply(500, '{"error":"Internal Server Error"}')
+                return
+            try:
+                request = json.loads(body)
+            except ValueError:
+                self.reply(400, '{"error":"Bad Request"}')
+                return
+            self.reply(200, json.dumps(fake.gql(request), separators=(",", ":")))
+        elif path == "/spade":
+            fake.spade(body)
+            self.reply(204)
+        elif path.startswith("/oauth2/"):
+            fake.count(f"http:POST {path}")
+            self.reply(200, json.dumps(fake.oauth(path)))
+        elif path == "/integrity":
+            expiration = int(time.time() * 1000) + 16 * 60 * 60 * 1000
+            self.reply(
+                200, json.dumps({"token": uuid.uuid4().hex, "expiration": expiration})
+            )
+        else:
+            self.reply(404, '{"error":"Not Found"}')
+
+    # Don't print each request on stderr
+    def log_message(self, format, *args):
+        pass
+
+
+# Minimal WebSocket server (RFC 6455): text, ping and close frames, no fragmentation
+class PubSubHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.topics = set()
+        self.send_lock = Lock()
+
+    def handshake(self):
+        headers = {}
+        request_line = self.rfile.readline()
+        if request_line == b"":
+            return False
+        while True:
+            line = self.rfile.readline().decode("latin-1").strip()
+            if line == "":
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get("sec-websocket-key")
+        if key is None:
+            self.wfile.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return False
+        accept = base64.b64encode(
+            hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()
+        ).decode("ascii")
+        self.wfile.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+            ).encode("ascii")
+        )
+        return True
+
+    def read_frame(self):
+        header = self.rfile.read(2)
+        if len(header) < 2:
+            return None, None
+        opcode = header[0] & 0x0F
+        masked = header[1] & 0x80
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self.rfile.read(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self.rfile.read(8))[0]
+        mask = self.rfile.read(4) if masked else None
+        payload = self.rfile.read(length)
+        if mask is not None:
+            payload = bytes(
+                byte ^ mask[index % 4] for index, byte in enumerate(payload)
+            )
+        return opcode, payload
+
+    def send_frame(self, opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack(">BB", 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack(">BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+        with self.send_lock:
+            self.wfile.write(header + payload)
+
+    def send(self, message):
+        self.send_frame(0x1, json.dumps(message).encode("utf-8"))
+
+    def close(self):
+        try:
+            self.send_frame(0x8, b"")
+        except OSError:
+            pass
+
+    def handle(self):
+        fake = self.server.fake
+        if self.handshake() is False:
+            return
+        fake.add_connection(self)
+        try:
+            while fake.running is True:
+                opcode, payload = self.read_frame()
+                # Connection closed
+                if opcode is None or opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    self.send_frame(0xA, payload)
+                elif opcode == 0x1:
+                    fake.on_pubsub_request(self, json.loads(payload))
+        except (OSError, ValueError) as e:
+            logger.debug(f"PubSub connection closed: {e}")
+        finally:
+            fake.remove_connection(self)
+
+
+class IRCHandler(socketserver.StreamRequestHandler):
+    def send(self, line):
+        self.wfile.write(f"{line}\r\n".encode("utf-8"))
+
+    def handle(self):
+        fake = self.server.fake
+        nickname = "*"
+        try:
+            for raw in self.rfile:
+                command, _, params = (
+                    raw.decode("utf-8", "replace").strip().partition(" ")
+                )
+                command = command.upper()
+                if command == "NICK":
+                    nickname = params.strip()
+                    self.send(f":tmi.twitch.tv 001 {nickname} :Welcome, GLHF!")
+                elif command == "PING":
+                    self.send(f"PONG {params}")
+                elif command in ["JOIN", "PART"]:
+                    for channel in params.split(" ")[0].split(","):
+                        fake.count(f"irc:{command}")
+                        self.send(
+                            f":{nickname}!{nickname}@{nickname}.tmi.twitch.tv {command} {channel}"
+                        )
+                elif command == "QUIT":
+                    break
+        except OSError as e:
+            logger.debug(f"IRC connection closed: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the Twitch endpoints"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="HTTP (GQL, spade, OAuth)")
+    parser.add_argument("--pubsub-port", type=int, default=0)
+    parser.add_argument("--irc-port", type=int, default=0)
+    parser.add_argument("--username", default="fakeuser")
+    parser.add_argument("--channels", type=int, default=10)
+    parser.add_argument("--online-ratio", type=float, default=0.5)
+    parser.add_argument(
+        "--event-rate", type=float, default=1.0, help="PubSub events per second"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to each HTTP response"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Random extra latency, in seconds"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Probability of a GQL error"
+    )
+    parser.add_argument(
+        "--flap-rate", type=float, default=0.0, help="Probability of a stream-up/down"
+    )
+    parser.add_argument("--reconnect-interval", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    fake = FakeTwitch(
+        host=args.host,
+        port=args.port,
+        pubsub_port=args.pubsub_port,
+        irc_port=args.irc_port,
+        username=args.username,
+        channels=args.channels,
+        online_ratio=args.online_ratio,
+        event_rate=args.event_rate,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        flap_rate=args.flap_rate,
+        reconnect_interval=args.reconnect_interval,
+        seed=args.seed,
+    ).start()
+    for name, value in fake.environment().items():
+        print(f"export {name}={value}")
+    print(
+        f"# Username: {fake.username}, streamers: channel0..channel{len(fake.channels) - 1}"
+    )
+    # kill <pid> stops the server and prints the stats, like CTRL+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        fake.stop()
+        for key, value in sorted(fake.stats.items()):
+            print(f"{key} {value}")
+
+
+if __name__ == "__main__":
+    main()
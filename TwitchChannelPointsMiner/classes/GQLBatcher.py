@@ -0,0 +1,75 @@
+import logging
+from concurrent.futures import Future
+from threading import Lock, Timer
+
+logger = logging.getLogger(__name__)
+
+
+class GQLBatcher(object):
+    """
+    Collect the GQL operations submitted within a short window and send them
+    as a single JSON array POST. Each submit() returns a Future resolved with
+    the response of that operation.
+    Can be used also as context manager, all the pending operations are sent on exit:
+        with twitch.gql_batcher as batch:
+            futures = [batch.submit(op) for op in operations]
+    """
+
+    __slots__ = ["post", "window", "max_size", "pending", "timer", "mutex"]
+
+    def __init__(self, post, window: float = 0.05, max_size: int = 20):
+        # post(operations: list) -> list of responses, same length and order
+        self.post = post
+        self.window = window
+        self.max_size = max_size
+
+        self.pending = []
+        self.timer = None
+        self.mutex = Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def submit(self, json_data) -> Future:
+        future = Future()
+        batch = []
+        with self.mutex:
+            self.pending.append((json_data, future))
+            if len(self.pending) >= self.max_size:
+                batch = self.__take()
+            elif self.timer is None:
+                self.timer = Timer(self.window, self.flush)
+                self.timer.daemon = True
+                self.timer.name = "GQL batcher"
+                self.timer.start()
+
+        self.__send(batch)
+        return future
+
+    def flush(self):
+        with self.mutex:
+            batch = self.__take()
+        self.__send(batch)
+
+    def __take(self):
+        batch, self.pending = self.pending, []
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        return batch
+
+    def __send(self, batch):
+        if batch == []:
+            return
+        try:
+            responses = self.post([json_data for json_data, _ in batch])
+        except Exception as e:
+            logger.error(f"Error while sending a batch of GQL operations: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), response in zip(batch, responses):
+            future.set_result(response)
@@ -0,0 +1,262 @@
+import logging
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labelnames, labels, extra=()):
+    pairs = list(zip(labelnames, labels)) + list(extra)
+    if pairs == []:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Minimal implementation of the Prometheus metrics (text exposition format 0.0.4),
+# the labels are passed as positional values in the same order of labelnames
+class Metric(object):
+    __slots__ = ["name", "documentation", "labelnames", "values", "mutex"]
+
+    type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # {labels: value}
+        self.values = {}
+        self.mutex = Lock()
+
+    def samples(self):
+        with self.mutex:
+            return [
+                (self.name, format_labels(self.labelnames, labels), value)
+                for labels, value in self.values.items()
+            ]
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines += [
+            f"{name}{labels} {format_value(value)}"
+            for name, labels, value in self.samples()
+        ]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    __slots__ = []
+
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self.mutex:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+# The value is read when the metrics are rendered.
+# function() returns a number, or {labels: number} if the gauge has labels
+class Gauge(Metric):
+    __slots__ = ["function"]
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, function, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def samples(self):
+        try:
+            values = self.function()
+        except Exception as e:
+            logger.debug(f"Unable to read the metric {self.name}: {e}")
+            return []
+        if isinstance(values, dict) is False:
+            values = {(): values}
+        return [
+            (self.name, format_labels(self.labelnames, labels), value)
+            for labels, value in values.items()
+        ]
+
+
+class Histogram(Metric):
+    __slots__ = ["buckets"]
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name,
+        documentation,
+        labelnames=(),
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value, *labels):
+        with self.mutex:
+            # [count per bucket (not cumulative), sum, count]
+            entry = self.values.setdefault(labels, [[0] * len(self.buckets), 0, 0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self):
+        samples = []
+        with self.mutex:
+            for labels, (counts, total, count) in self.values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append(
+                        (
+                            f"{self.name}_bucket",
+                            format_labels(
+                                self.labelnames, labels, [("le", format_value(bound))]
+                            ),
+                            cumulative,
+                        )
+                    )
+                samples.append(
+                    (f"{self.name}_sum", format_labels(self.labelnames, labels), total)
+                )
+                samples.append(
+                    (
+                        f"{self.name}_count",
+                        format_labels(self.labelnames, labels),
+                        count,
+                    )
+                )
+        return samples
+
+
+class Registry(object):
+    __slots__ = ["metrics", "mutex"]
+
+    def __init__(self):
+        # {name: metric}
+        self.metrics = {}
+        self.mutex = Lock()
+
+    def register(self, metric):
+        with self.mutex:
+            # Registering again the same name replaces the metric (e.g. a new gauge callback)
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), **kwargs):
+        return self.register(Histogram(name, documentation, labelnames, **kwargs))
+
+    def gauge(self, name, documentation, function, labelnames=()):
+        return self.register(Gauge(name, documentation, function, labelnames))
+
+    def render(self):
+        with self.mutex:
+            metrics = list(self.metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = Registry()
+
+GQL_REQUESTS = registry.counter(
+    "twitch_miner_gql_requests_total", "GQL operations sent", ["operation"]
+)
+GQL_ERRORS = registry.counter(
+    "twitch_miner_gql_errors_total",
+    "GQL operations failed (network error, status code != 200 or GraphQL errors)",
+    ["operation"],
+)
+GQL_LATENCY = registry.histogram(
+    "twitch_miner_gql_request_duration_seconds",
+    "Duration of the GQL requests, a batch counts for each of its operations",
+    ["operation"],
+)
+MINUTE_WATCHED_REQUESTS = registry.counter(
+    "twitch_miner_minute_watched_requests_total",
+    "Minute-watched events sent, by status code",
+    ["status"],
+)
+MINUTE_WATCHED_LATENCY = registry.histogram(
+    "twitch_miner_minute_watched_request_duration_seconds",
+    "Duration of the minute-watched requests",
+)
+PUBSUB_MESSAGES = registry.counter(
+    "twitch_miner_pubsub_messages_total", "PubSub messages received", ["topic"]
+)
+PUBSUB_DUPLICATES = registry.counter(
+    "twitch_miner_pubsub_duplicates_total",
+    "PubSub messages skipped, already received by another connection",
+    ["topic"],
+)
+PUBSUB_LISTEN_ERRORS = registry.counter(
+    "twitch_miner_pubsub_listen_errors_total",
+    "LISTEN requests rejected by the PubSub server, by error",
+    ["error"],
+)
+WEBSOCKET_RECONNECTS = registry.counter(
+    "twitch_miner_websocket_reconnects_total",
+    "PubSub reconnections, by index of the connection",
+    ["index"],
+)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Don't print each request on stderr
+    def log_message(self, format, *args):
+        pass
+
+
+# Standalone /metrics server, for when the analytics server is not running
+def start_metrics_server(host: str = "127.0.0.1", port: int = 9100):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.name = "Metrics server"
+    thread.start()
+    logger.info(
+        f"Metrics available on http://{host}:{port}/metrics",
+        extra={"emoji": ":bar_chart:"},
+    )
+    return server
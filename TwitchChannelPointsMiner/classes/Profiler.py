@@ -0,0 +1,151 @@
+import logging
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+from TwitchChannelPointsMiner.classes.Metrics import registry
+from TwitchChannelPointsMiner.classes.Settings import Settings
+
+logger = logging.getLogger(__name__)
+
+HOT_PATH_DURATION = registry.histogram(
+    "twitch_miner_hot_path_duration_seconds",
+    "Wall time of the instrumented functions (enable_instrumentation=True)",
+    ["function"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10),
+)
+
+
+# Context manager, record the wall time of the block:
+#   with timed("send_minute_watched_events"):
+#       ...
+# Only a boolean check if the instrumentation is disabled
+class timed(object):
+    __slots__ = ["name", "start"]
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if Settings.enable_instrumentation is True:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.start is not None:
+            HOT_PATH_DURATION.observe(time.perf_counter() - self.start, self.name)
+
+
+# Decorator, record the wall time of each call.
+# label(*args, **kwargs) can add a suffix to the name (e.g. the PubSub topic),
+# it's called only if the instrumentation is enabled
+def instrumented(name, label=None):
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if Settings.enable_instrumentation is not True:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                suffix = label(*args, **kwargs) if label is not None else None
+                HOT_PATH_DURATION.observe(
+                    time.perf_counter() - start,
+                    name if suffix is None else f"{name}:{suffix}",
+                )
+
+        return wrapper
+
+    return decorator
+
+
+# Topic of a raw PubSub message without parsing the whole JSON
+def pubsub_topic(ws, message):
+    match = re.search(r'"topic":\s*"([\w-]+)', message)
+    return None if match is None else match.group(1)
+
+
+# Statistical profiler: sample the stack of all the threads every interval seconds,
+# for duration seconds, then write the stacks in the "collapsed" format
+# (one line per stack: frame;frame;frame count), readable by flamegraph.pl or speedscope.
+# Started by the SIGUSR1 signal: kill -USR1 <pid>
+class SamplingProfiler(object):
+    __slots__ = ["username", "interval", "duration", "mutex"]
+
+    def __init__(self, username, interval: float = 0.01, duration: float = 30):
+        self.username = username
+        self.interval = interval
+        self.duration = duration
+        self.mutex = threading.Lock()
+
+    def register_signal(self):
+        # Not available on Windows
+        if hasattr(signal, "SIGUSR1") is False:
+            logger.warning(
+                "SIGUSR1 is not available, the sampling profiler is disabled"
+            )
+            return
+        signal.signal(signal.SIGUSR1, lambda signum, frame: self.start())
+
+    def start(self):
+        # Already running
+        if self.mutex.locked() is True:
+            return
+        thread = threading.Thread(target=self.run)
+        thread.daemon = True
+        thread.name = "Sampling profiler"
+        thread.start()
+
+    def run(self):
+        with self.mutex:
+            logger.info(
+                f"Sampling the threads for {self.duration} seconds",
+                extra={"emoji": ":mag:"},
+            )
+            stacks = self.sample()
+            fname = self.dump(stacks)
+            logger.info(f"Profile saved: {fname}", extra={"emoji": ":mag:"})
+
+    def sample(self):
+        current_thread = threading.get_ident()
+        names = {}
+        stacks = Counter()
+        end = time.perf_counter() + self.duration
+        while time.perf_counter() < end:
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == current_thread:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                    )
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                stacks[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+        return stacks
+
+    def dump(self, stacks):
+        logs_path = os.path.join(Path().absolute(), "logs")
+        Path(logs_path).mkdir(parents=True, exist_ok=True)
+        fname = os.path.join(
+            logs_path,
+            f"{self.username}.profile.{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt",
+        )
+        with open(fname, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return fname
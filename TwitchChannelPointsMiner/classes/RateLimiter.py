@@ -0,0 +1,34 @@
+import time
+from threading import Lock
+
+
+# Token bucket shared between all the threads.
+# rate = requests per second, burst = how many requests can be sent at once
+class RateLimiter(object):
+    __slots__ = ["rate", "burst", "tokens", "updated_at", "mutex"]
+
+    def __init__(self, rate: float = None, burst: int = None):
+        self.rate = rate
+        self.burst = max(1, int(rate)) if burst is None and rate else burst
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.mutex = Lock()
+
+    def acquire(self):
+        # No limit
+        if not self.rate:
+            return
+
+        with self.mutex:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            # Reserve the token now, the balance could go negative.
+            # The next callers will wait also for the tokens reserved before them
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
@@ -0,0 +1,43 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+# Keys of the PubSub messages received in the last `window` seconds, shared by all the
+# connections of a pool: a message delivered twice (by two connections, or by the old one
+# and its replacement during a reconnection) is handled once.
+# The keys expire in insertion order: check, insert and expiry are O(1) (amortized)
+class RecentMessages(object):
+    __slots__ = ["window", "max_size", "keys", "mutex"]
+
+    def __init__(self, window: float = 120, max_size: int = 10000):
+        self.window = window
+        self.max_size = max_size
+        # {key: expiry}, the oldest first
+        self.keys = OrderedDict()
+        self.mutex = Lock()
+
+    # True if the key was already seen in the window, else remember it
+    def seen(self, key) -> bool:
+        now = time.monotonic()
+        with self.mutex:
+            while self.keys:
+                oldest = next(iter(self.keys))
+                if self.keys[oldest] > now:
+                    break
+                del self.keys[oldest]
+
+            if key in self.keys:
+                return True
+            self.keys[key] = now + self.window
+            # Bounded even with a burst of messages
+            if len(self.keys) > self.max_size:
+                self.keys.popitem(last=False)
+            return False
+
+    def clear(self):
+        with self.mutex:
+            self.keys.clear()
+
+    def __len__(self):
+        return len(self.keys)
@@ -10,6 +10,22 @@ class Priority(Enum):
     POINTS_DESCEDING = auto()
 
 
+class AnalyticsBackend(Enum):
+    JSON_LINES = auto()
+    SQLITE = auto()
+
+    def __str__(self):
+        return self.name
+
+
+class PubSubEngine(Enum):
+    THREADS = auto()
+    ASYNCIO = auto()
+
+    def __str__(self):
+        return self.name
+
+
 class FollowersOrder(Enum):
     ASC = auto()
     DESC = auto()
@@ -20,8 +36,17 @@ class FollowersOrder(Enum):
 
 # Empty object shared between class
 class Settings(object):
-    __slots__ = ["logger", "streamer_settings",
-                 "enable_analytics", "disable_ssl_cert_verification", "disable_at_in_nickname"]
+    __slots__ = [
+        "logger",
+        "streamer_settings",
+        "enable_analytics",
+        "analytics_path",
+        "analytics_store",
+        "analytics_writer",
+        "enable_instrumentation",
+        "disable_ssl_cert_verification",
+        "disable_at_in_nickname",
+    ]
 
 
 class Events(Enum):
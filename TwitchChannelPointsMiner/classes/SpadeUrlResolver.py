@@ -0,0 +1,111 @@
+import logging
+import re
+import time
+from threading import Lock, Thread
+
+import requests
+
+from TwitchChannelPointsMiner.constants import URL, USER_AGENTS
+
+logger = logging.getLogger(__name__)
+
+
+# The spade_url is the same for all the channels, it only changes with the client build.
+# Resolve it once per build id and share it between all the streamers
+class SpadeUrlResolver(object):
+    __slots__ = ["session", "timeout", "ttl", "urls", "mutex"]
+
+    def __init__(self, session, timeout=None, ttl: int = 6 * 60 * 60):
+        self.session = session
+        self.timeout = timeout
+        self.ttl = ttl
+        # {build_id: {"spade_url": ..., "updated_at": ..., "retry_at": ..., "failures": ...}}
+        self.urls = {}
+        self.mutex = Lock()
+
+    # Blocking only for the first request of a build: the minute-watched loop passes
+    # blocking=False and never waits for twitch.tv
+    def get(self, build_id, page_url=URL, blocking: bool = True):
+        entry = self.urls.get(build_id)
+        if entry is None or entry["spade_url"] is None:
+            # Nothing to serve: resolve now, unless the last scrape failed recently
+            if blocking is True:
+                return self.refresh(build_id, page_url)
+            self.refresh_in_background(build_id, page_url)
+            return None
+        if time.time() - entry["updated_at"] > self.ttl:
+            self.refresh_in_background(build_id, page_url)
+        return entry["spade_url"]
+
+    # Called when Twitch rejects our minute-watched events
+    def invalidate(self, build_id, page_url=URL):
+        self.refresh_in_background(build_id, page_url)
+
+    def refresh_in_background(self, build_id, page_url=URL):
+        if self.mutex.locked() is False and self.__can_retry(build_id) is True:
+            thread = Thread(target=self.refresh, args=(build_id, page_url))
+            thread.daemon = True
+            thread.name = "Spade URL refresh"
+            thread.start()
+
+    def refresh(self, build_id, page_url=URL):
+        with self.mutex:
+            entry = self.urls.get(build_id)
+            # Refreshed by another thread while we were waiting, or failed recently
+            if self.__can_retry(build_id) is False:
+                return entry["spade_url"]
+
+            spade_url = self.__scrape(page_url)
+            now = time.time()
+            if spade_url is None:
+                # Keep serving the old one (if any), retry with an exponential backoff:
+                # 1, 2, 4... up to 30 minutes
+                failures = 1 if entry is None else entry["failures"] + 1
+                self.urls[build_id] = {
+                    "spade_url": None if entry is None else entry["spade_url"],
+                    "updated_at": now if entry is None else entry["updated_at"],
+                    "retry_at": now + min(60 * 2 ** (failures - 1), 30 * 60),
+                    "failures": failures,
+                }
+                return self.urls[build_id]["spade_url"]
+
+            # Keep only the current build. Don't scrape twitch.tv more than once per minute
+            self.urls = {
+                build_id: {
+                    "spade_url": spade_url,
+                    "updated_at": now,
+                    "retry_at": now + 60,
+                    "failures": 0,
+                }
+            }
+            return spade_url
+
+    def __can_retry(self, build_id):
+        entry = self.urls.get(build_id)
+        return entry is None or time.time() >= entry["retry_at"]
+
+    def __scrape(self, page_url):
+        try:
+            # fixes AttributeError: 'NoneType' object has no attribute 'group'
+            # headers = {"User-Agent": self.user_agent}
+            headers = {"User-Agent": USER_AGENTS["Linux"]["FIREFOX"]}
+
+            main_page_request = self.session.get(
+                page_url, headers=headers, timeout=self.timeout
+            )
+            response = main_page_request.text
+            # https://static.twitchcdn.net/config/settings.<hash>.js
+            regex_settings = "(https?://[^\"' ]+/config/settings.*?js)"
+            settings_url = re.search(regex_settings, response).group(1)
+
+            settings_request = self.session.get(
+                settings_url, headers=headers, timeout=self.timeout
+            )
+            response = settings_request.text
+            regex_spade = '"spade_url":"(.*?)"'
+            spade_url = re.search(regex_spade, response).group(1)
+            logger.debug(f"Spade URL: {spade_url}")
+            return spade_url
+        except (requests.exceptions.RequestException, AttributeError) as e:
+            logger.error(f"Something went wrong during extraction of 'spade_url': {e}")
+            return None
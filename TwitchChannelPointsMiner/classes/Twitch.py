@@ -11,27 +11,42 @@ import random
 import re
 import string
 import time
+from concurrent.futures import ThreadPoolExecutor
 # from datetime import datetime
 from pathlib import Path
 from secrets import choice, token_hex
+from threading import Lock, Thread
 
 # import json
 # from base64 import urlsafe_b64decode
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from TwitchChannelPointsMiner.classes.ChannelCache import ChannelCache
 from TwitchChannelPointsMiner.classes.entities.Campaign import Campaign
 from TwitchChannelPointsMiner.classes.entities.Drop import Drop
 from TwitchChannelPointsMiner.classes.Exceptions import (
     StreamerDoesNotExistException,
     StreamerIsOfflineException,
 )
+from TwitchChannelPointsMiner.classes.GQLBatcher import GQLBatcher
+from TwitchChannelPointsMiner.classes.Metrics import (
+    GQL_ERRORS,
+    GQL_LATENCY,
+    GQL_REQUESTS,
+    MINUTE_WATCHED_LATENCY,
+    MINUTE_WATCHED_REQUESTS,
+)
+from TwitchChannelPointsMiner.classes.Profiler import instrumented, timed
+from TwitchChannelPointsMiner.classes.RateLimiter import RateLimiter
 from TwitchChannelPointsMiner.classes.Settings import (
     Events,
     FollowersOrder,
     Priority,
     Settings,
 )
+from TwitchChannelPointsMiner.classes.SpadeUrlResolver import SpadeUrlResolver
 from TwitchChannelPointsMiner.classes.TwitchLogin import TwitchLogin
 from TwitchChannelPointsMiner.constants import (
     CLIENT_ID,
@@ -59,10 +74,30 @@ class Twitch(object):
         # "integrity_expire",
         "client_session",
         "client_version",
+        "client_version_ttl",
+        "client_version_updated_at",
+        "client_version_lock",
         "twilight_build_id_pattern",
+        "session",
+        "timeout",
+        "gql_batcher",
+        "rate_limiter",
+        "channel_cache",
+        "spade_url_resolver",
     ]
 
-    def __init__(self, username, user_agent, password=None):
+    def __init__(
+        self,
+        username,
+        user_agent,
+        password=None,
+        pool_size: int = 20,
+        keep_alive: bool = True,
+        timeout: tuple = (5, 20),
+        client_version_ttl: int = 60 * 60,
+        # Max GQL requests per second, None = unlimited
+        rate_limit: float = None,
+    ):
         cookies_path = os.path.join(Path().absolute(), "cookies")
         Path(cookies_path).mkdir(parents=True, exist_ok=True)
         self.cookies_file = os.path.join(cookies_path, f"{username}.pkl")
@@ -78,9 +113,32 @@ class Twitch(object):
         # self.integrity_expire = 0
         self.client_session = token_hex(16)
         self.client_version = CLIENT_VERSION
+        self.client_version_ttl = client_version_ttl
+        self.client_version_updated_at = 0
+        self.client_version_lock = Lock()
         self.twilight_build_id_pattern = re.compile(
             r"window\.__twilightBuildID=\"([0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-4[0-9A-Fa-f]{3}-[89ABab][0-9A-Fa-f]{3}-[0-9A-Fa-f]{12})\";"
         )
+        # (connect, read) timeout in seconds, used for every request of the session
+        self.timeout = timeout
+        self.session = self.__create_session(pool_size, keep_alive)
+        # Coalesce the operations sent by different threads in the same moment
+        self.gql_batcher = GQLBatcher(self.post_gql_requests)
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.channel_cache = ChannelCache(username)
+        self.spade_url_resolver = SpadeUrlResolver(self.session, self.timeout)
+
+    # Shared session for GQL, spade and twitch.tv requests
+    # Re-use the TCP+TLS connections instead of a new handshake for each request
+    def __create_session(self, pool_size, keep_alive):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(
+            {"Connection": "keep-alive" if keep_alive is True else "close"}
+        )
+        return session
 
     def login(self):
         if not os.path.isfile(self.cookies_file):
@@ -89,67 +147,63 @@ class Twitch(object):
         else:
             self.twitch_login.load_cookies(self.cookies_file)
             self.twitch_login.set_token(self.twitch_login.get_auth_token())
+        # Scrape the client version only once here, then refresh it in background
+        self.update_client_version()
 
     # === STREAMER / STREAM / INFO === #
     def update_stream(self, streamer):
         if streamer.stream.update_required() is True:
             stream_info = self.get_stream_info(streamer)
             if stream_info is not None:
-                streamer.stream.update(
-                    broadcast_id=stream_info["stream"]["id"],
-                    title=stream_info["broadcastSettings"]["title"],
-                    game=stream_info["broadcastSettings"]["game"],
-                    tags=stream_info["stream"]["tags"],
-                    viewers_count=stream_info["stream"]["viewersCount"],
-                )
+                self.__update_stream(streamer, stream_info)
+
+    def __update_stream(self, streamer, stream_info):
+        streamer.stream.update(
+            broadcast_id=stream_info["stream"]["id"],
+            title=stream_info["broadcastSettings"]["title"],
+            game=stream_info["broadcastSettings"]["game"],
+            tags=stream_info["stream"]["tags"],
+            viewers_count=stream_info["stream"]["viewersCount"],
+        )
 
-                event_properties = {
-                    "channel_id": streamer.channel_id,
-                    "broadcast_id": streamer.stream.broadcast_id,
-                    "player": "site",
-                    "user_id": self.twitch_login.get_user_id(),
-                    "live": True,
-                    "channel": streamer.username
-                }
+        event_properties = {
+            "channel_id": streamer.channel_id,
+            "broadcast_id": streamer.stream.broadcast_id,
+            "player": "site",
+            "user_id": self.twitch_login.get_user_id(),
+            "live": True,
+            "channel": streamer.username
+        }
 
-                if (
-                    streamer.stream.game_name() is not None
-                    and streamer.stream.game_id() is not None
-                    and streamer.settings.claim_drops is True
-                ):
-                    event_properties["game"] = streamer.stream.game_name()
-                    event_properties["game_id"] = streamer.stream.game_id()
-                    # Update also the campaigns_ids so we are sure to tracking the correct campaign
-                    streamer.stream.campaigns_ids = (
-                        self.__get_campaign_ids_from_streamer(streamer)
-                    )
+        if (
+            streamer.stream.game_name() is not None
+            and streamer.stream.game_id() is not None
+            and streamer.settings.claim_drops is True
+        ):
+            event_properties["game"] = streamer.stream.game_name()
+            event_properties["game_id"] = streamer.stream.game_id()
+            # Update also the campaigns_ids so we are sure to tracking the correct campaign
+            streamer.stream.campaigns_ids = self.__get_campaign_ids_from_streamer(
+                streamer
+            )
 
-                streamer.stream.payload = [
-                    {"event": "minute-watched", "properties": event_properties}
-                ]
+        streamer.stream.payload = [
+            {"event": "minute-watched", "properties": event_properties}
+        ]
 
-    def get_spade_url(self, streamer):
-        try:
-            # fixes AttributeError: 'NoneType' object has no attribute 'group'
-            # headers = {"User-Agent": self.user_agent}
-            from TwitchChannelPointsMiner.constants import USER_AGENTS
-            headers = {"User-Agent": USER_AGENTS["Linux"]["FIREFOX"]}
-
-            main_page_request = requests.get(
-                streamer.streamer_url, headers=headers)
-            response = main_page_request.text
-            # logger.info(response)
-            regex_settings = "(https://static.twitchcdn.net/config/settings.*?js)"
-            settings_url = re.search(regex_settings, response).group(1)
-
-            settings_request = requests.get(settings_url, headers=headers)
-            response = settings_request.text
-            regex_spade = '"spade_url":"(.*?)"'
-            streamer.stream.spade_url = re.search(
-                regex_spade, response).group(1)
-        except requests.exceptions.RequestException as e:
-            logger.error(
-                f"Something went wrong during extraction of 'spade_url': {e}")
+    def get_spade_url(self, streamer, blocking=True):
+        # Shared between all the streamers, scraped only once per client build
+        spade_url = self.spade_url_resolver.get(
+            self.get_client_version(), streamer.streamer_url, blocking=blocking
+        )
+        if spade_url is not None:
+            streamer.stream.spade_url = spade_url
+            self.channel_cache.update(streamer.username, spade_url=spade_url)
+        elif streamer.stream.spade_url is None:
+            # Use the last known spade_url (if any)
+            channel = self.channel_cache.get(streamer.username)
+            if channel is not None:
+                streamer.stream.spade_url = channel.get("spade_url")
 
     def get_broadcast_id(self, streamer):
         json_data = copy.deepcopy(GQLOperations.WithIsStreamLiveQuery)
@@ -162,17 +216,38 @@ class Twitch(object):
             else:
                 raise StreamerIsOfflineException
 
-    def get_stream_info(self, streamer):
+    def __stream_info_request(self, streamer):
         json_data = copy.deepcopy(
             GQLOperations.VideoPlayerStreamInfoOverlayChannel)
         json_data["variables"] = {"channel": streamer.username}
-        response = self.post_gql_request(json_data)
+        return json_data
+
+    def get_stream_info(self, streamer):
+        response = self.post_gql_request(self.__stream_info_request(streamer))
         if response != {}:
             if response["data"]["user"]["stream"] is None:
                 raise StreamerIsOfflineException
             else:
                 return response["data"]["user"]
 
+    # Same as get_stream_info but for many streamers in batched requests.
+    # Return a dict {username: user}, user is None if the streamer is offline.
+    # Streamers with a failed request are not present in the dict
+    def get_streams_info(self, streamers):
+        responses = self.post_gql_requests(
+            [self.__stream_info_request(streamer) for streamer in streamers]
+        )
+        streams_info = {}
+        for streamer, response in zip(streamers, responses):
+            try:
+                user = response["data"]["user"]
+                streams_info[streamer.username] = (
+                    None if user["stream"] is None else user
+                )
+            except (KeyError, TypeError):
+                continue
+        return streams_info
+
     def check_streamer_online(self, streamer):
         if time.time() < streamer.offline_at + 60:
             return
@@ -191,19 +266,95 @@ class Twitch(object):
             except StreamerIsOfflineException:
                 streamer.set_offline()
 
-    def get_channel_id(self, streamer_username):
+    # Same as check_streamer_online but the live status of all the streamers is
+    # fetched with batched requests. Only the online streamers need more requests
+    # (spade_url, drops campaigns), done by a pool of max_workers threads
+    def check_streamers_online(self, streamers, max_workers=8):
+        streams_info = self.get_streams_info(streamers)
+
+        def check(streamer):
+            if streamer.username not in streams_info:
+                # The batched request failed, fallback to the single request
+                self.check_streamer_online(streamer)
+            elif streams_info[streamer.username] is None:
+                streamer.set_offline()
+            else:
+                self.get_spade_url(streamer)
+                self.__update_stream(streamer, streams_info[streamer.username])
+                streamer.set_online()
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="Check online"
+        ) as executor:
+            for future in [executor.submit(check, s) for s in streamers]:
+                try:
+                    future.result()
+                except Exception:
+                    logger.error(
+                        "Exception raised while checking streamers online",
+                        exc_info=True,
+                    )
+
+    def __channel_id_request(self, streamer_username):
         json_data = copy.deepcopy(GQLOperations.ReportMenuItem)
         json_data["variables"] = {"channelLogin": streamer_username}
-        json_response = self.post_gql_request(json_data)
+        return json_data
+
+    def get_channel_id(self, streamer_username):
+        channel_id = self.channel_cache.get_channel_id(streamer_username)
+        if channel_id is not None:
+            return channel_id
+
+        json_response = self.post_gql_request(
+            self.__channel_id_request(streamer_username)
+        )
         if (
             "data" not in json_response
             or "user" not in json_response["data"]
             or json_response["data"]["user"] is None
         ):
+            self.channel_cache.invalidate(streamer_username)
             raise StreamerDoesNotExistException
         else:
+            self.__update_channel_cache(
+                streamer_username, json_response["data"]["user"]
+            )
             return json_response["data"]["user"]["id"]
 
+    def __update_channel_cache(self, streamer_username, user):
+        self.channel_cache.update(
+            streamer_username,
+            channel_id=user["id"],
+            display_name=user.get("displayName"),
+        )
+
+    # Same as get_channel_id but for many usernames in batched requests.
+    # Return a dict {username: channel_id}, channel_id is None if the streamer doesn't exist.
+    # Usernames with a failed request are not present in the dict
+    def get_channel_ids(self, usernames):
+        channel_ids = {}
+        for username in usernames:
+            channel_id = self.channel_cache.get_channel_id(username)
+            if channel_id is not None:
+                channel_ids[username] = channel_id
+
+        usernames = [username for username in usernames if username not in channel_ids]
+        responses = self.post_gql_requests(
+            [self.__channel_id_request(username) for username in usernames]
+        )
+        for username, response in zip(usernames, responses):
+            try:
+                user = response["data"]["user"]
+            except (KeyError, TypeError):
+                continue
+            if user is None:
+                channel_ids[username] = None
+                self.channel_cache.invalidate(username)
+            else:
+                channel_ids[username] = user["id"]
+                self.__update_channel_cache(username, user)
+        return channel_ids
+
     def get_followers(
         self, limit: int = 100, order: FollowersOrder = FollowersOrder.ASC
     ):
@@ -268,30 +419,77 @@ class Twitch(object):
             )
             self.__chuncked_sleep(random_sleep * 60, chunk_size=chunk_size)
 
+    # Twitch GQL accepts a list of operations, return a list of responses in the same order
+    def post_gql_requests(self, operations, chunk_size=20):
+        responses = []
+        for chunk in create_chunks(operations, chunk_size):
+            response = (
+                self.post_gql_request(chunk)
+                if len(chunk) > 1
+                else [self.post_gql_request(chunk[0])]
+            )
+            if isinstance(response, list) is False or len(response) != len(chunk):
+                response = [{}] * len(chunk)
+            responses += response
+        return responses
+
+    @instrumented("post_gql_request")
     def post_gql_request(self, json_data):
+        operations = (
+            [op.get("operationName") for op in json_data]
+            if isinstance(json_data, list)
+            else [json_data.get("operationName")]
+        )
+        for operation in operations:
+            GQL_REQUESTS.inc(operation)
+
+        self.rate_limiter.acquire()
+        start = time.perf_counter()
         try:
-            response = requests.post(
+            response = self.session.post(
                 GQLOperations.url,
                 json=json_data,
+                timeout=self.timeout,
                 headers={
                     "Authorization": f"OAuth {self.twitch_login.get_auth_token()}",
                     "Client-Id": CLIENT_ID,
                     # "Client-Integrity": self.post_integrity(),
                     "Client-Session-Id": self.client_session,
-                    "Client-Version": self.update_client_version(),
+                    "Client-Version": self.get_client_version(),
                     "User-Agent": self.user_agent,
                     "X-Device-Id": self.device_id,
                 },
             )
+            # A batch counts for each of its operations
+            duration = time.perf_counter() - start
+            for operation in set(operations):
+                GQL_LATENCY.observe(duration, operation)
             logger.debug(
                 f"Data: {json_data}, Status code: {response.status_code}, Content: {response.text}"
             )
-            return response.json()
+            # Twitch rejects the request if the Client-Version is outdated
+            if response.status_code == 400:
+                self.get_client_version(force_refresh=True)
+            content = response.json()
+            if response.status_code != 200:
+                failed = operations
+            else:
+                # Status code 200 but GraphQL errors, for each operation of a batch
+                items = content if isinstance(content, list) else [content]
+                failed = [
+                    operation
+                    for operation, item in zip(operations, items)
+                    if isinstance(item, dict) and item.get("errors")
+                ]
+            for operation in failed:
+                GQL_ERRORS.inc(operation)
+            return content
         except requests.exceptions.RequestException as e:
-            logger.error(
-                f"Error with GQLOperations ({json_data['operationName']}): {e}"
-            )
-            return {}
+            for operation in operations:
+                GQL_ERRORS.inc(operation)
+            operation_name = ", ".join(set(operations))
+            logger.error(f"Error with GQLOperations ({operation_name}): {e}")
+            return {} if isinstance(json_data, list) is False else []
 
     # Request for Integrity Token
     # Twitch needs Authorization, Client-Id, X-Device-Id to generate JWT which is used for authorize gql requests
@@ -310,7 +508,7 @@ class Twitch(object):
                     "Authorization": f"OAuth {self.twitch_login.get_auth_token()}",
                     "Client-Id": CLIENT_ID,
                     "Client-Session-Id": self.client_session,
-                    "Client-Version": self.update_client_version(),
+                    "Client-Version": self.get_client_version(),
                     "User-Agent": self.user_agent,
                     "X-Device-Id": self.device_id,
                 },
@@ -349,9 +547,29 @@ class Twitch(object):
         else:
             return False"""
 
+    # Return the cached client version without blocking the caller.
+    # If the cache is expired (or force_refresh) start a refresh in background
+    def get_client_version(self, force_refresh=False):
+        elapsed = time.time() - self.client_version_updated_at
+        if (
+            elapsed > self.client_version_ttl
+            # Don't scrape twitch.tv more than once per minute on errors
+            or (force_refresh is True and elapsed > 60)
+        ) and self.client_version_lock.locked() is False:
+            thread = Thread(target=self.update_client_version)
+            thread.daemon = True
+            thread.name = "Client version refresh"
+            thread.start()
+        return self.client_version
+
     def update_client_version(self):
+        # Another thread is already scraping twitch.tv
+        if self.client_version_lock.acquire(blocking=False) is False:
+            return self.client_version
         try:
-            response = requests.get(URL)
+            # Even on failure wait for the ttl before retry
+            self.client_version_updated_at = time.time()
+            response = self.session.get(URL, timeout=self.timeout)
             if response.status_code != 200:
                 logger.debug(
                     f"Error with update_client_version: {response.status_code}"
@@ -367,6 +585,79 @@ class Twitch(object):
         except requests.exceptions.RequestException as e:
             logger.error(f"Error with update_client_version: {e}")
             return self.client_version
+        finally:
+            self.client_version_lock.release()
+
+    # Indexes (max 2) of the online streamers to watch, by priority
+    @staticmethod
+    def select_streamers_to_watch(streamers, streamers_index, priority):
+        streamers_watching = []
+        for prior in priority:
+            if prior == Priority.ORDER and len(streamers_watching) < 2:
+                # Get the first 2 items, they are already in order
+                streamers_watching += streamers_index[:2]
+
+            elif (
+                prior in [Priority.POINTS_ASCENDING, Priority.POINTS_DESCEDING]
+                and len(streamers_watching) < 2
+            ):
+                items = [
+                    {"points": streamers[index].channel_points, "index": index}
+                    for index in streamers_index
+                ]
+                items = sorted(
+                    items,
+                    key=lambda x: x["points"],
+                    reverse=(True if prior == Priority.POINTS_DESCEDING else False),
+                )
+                streamers_watching += [item["index"] for item in items][:2]
+
+            elif prior == Priority.STREAK and len(streamers_watching) < 2:
+                """
+                Check if we need need to change priority based on watch streak
+                Viewers receive points for returning for x consecutive streams.
+                Each stream must be at least 10 minutes long and it must have been at least 30 minutes since the last stream ended.
+                Watch at least 6m for get the +10
+                """
+                for index in streamers_index:
+                    if (
+                        streamers[index].settings.watch_streak is True
+                        and streamers[index].stream.watch_streak_missing is True
+                        and (
+                            streamers[index].offline_at == 0
+                            or ((time.time() - streamers[index].offline_at) // 60) > 30
+                        )
+                        and streamers[index].stream.minute_watched < 1
+                    ):
+                        streamers_watching.append(index)
+                        if len(streamers_watching) == 2:
+                            break
+
+            elif prior == Priority.DROPS and len(streamers_watching) < 2:
+                for index in streamers_index:
+                    if streamers[index].drops_condition() is True:
+                        streamers_watching.append(index)
+                        if len(streamers_watching) == 2:
+                            break
+
+            elif prior == Priority.SUBSCRIBED and len(streamers_watching) < 2:
+                streamers_with_multiplier = [
+                    index
+                    for index in streamers_index
+                    if streamers[index].viewer_has_points_multiplier()
+                ]
+                streamers_with_multiplier = sorted(
+                    streamers_with_multiplier,
+                    key=lambda x: streamers[x].total_points_multiplier(),
+                    reverse=True,
+                )
+                streamers_watching += streamers_with_multiplier[:2]
+
+        """
+        Twitch has a limit - you can't watch more than 2 channels at one time.
+        We take the first two streamers from the list as they have the highest priority (based on order or WatchStreak).
+        """
+        return streamers_watching[:2]
 
     def send_minute_watched_events(self, streamers, priority, chunk_size=3):
         while self.running:
@@ -387,150 +678,94 @@ class Twitch(object):
                         # Please perform a manually update and check if the user it's online
                         self.check_streamer_online(streamers[index])
 
-                streamers_watching = []
-                for prior in priority:
-                    if prior == Priority.ORDER and len(streamers_watching) < 2:
-                        # Get the first 2 items, they are already in order
-                        streamers_watching += streamers_index[:2]
-
-                    elif (
-                        prior in [Priority.POINTS_ASCENDING,
-                                  Priority.POINTS_DESCEDING]
-                        and len(streamers_watching) < 2
-                    ):
-                        items = [
-                            {"points": streamers[index].channel_points,
-                                "index": index}
-                            for index in streamers_index
-                        ]
-                        items = sorted(
-                            items,
-                            key=lambda x: x["points"],
-                            reverse=(
-                                True if prior == Priority.POINTS_DESCEDING else False
-                            ),
-                        )
-                        streamers_watching += [item["index"]
-                                               for item in items][:2]
-
-                    elif prior == Priority.STREAK and len(streamers_watching) < 2:
-                        """
-                        Check if we need need to change priority based on watch streak
-                        Viewers receive points for returning for x consecutive streams.
-                        Each stream must be at least 10 minutes long and it must have been at least 30 minutes since the last stream ended.
-                        Watch at least 6m for get the +10
-                        """
-                        for index in streamers_index:
-                            if (
-                                streamers[index].settings.watch_streak is True
-                                and streamers[index].stream.watch_streak_missing is True
-                                and (
-                                    streamers[index].offline_at == 0
-                                    or (
-                                        (time.time() -
-                                         streamers[index].offline_at)
-                                        // 60
-                                    )
-                                    > 30
-                                )
-                                and streamers[index].stream.minute_watched < 1
-                            ):
-                                streamers_watching.append(index)
-                                if len(streamers_watching) == 2:
-                                    break
-
-                    elif prior == Priority.DROPS and len(streamers_watching) < 2:
-                        for index in streamers_index:
-                            if streamers[index].drops_condition() is True:
-                                streamers_watching.append(index)
-                                if len(streamers_watching) == 2:
-                                    break
-
-                    elif prior == Priority.SUBSCRIBED and len(streamers_watching) < 2:
-                        streamers_with_multiplier = [
-                            index
-                            for index in streamers_index
-                            if streamers[index].viewer_has_points_multiplier()
-                        ]
-                        streamers_with_multiplier = sorted(
-                            streamers_with_multiplier,
-                            key=lambda x: streamers[x].total_points_multiplier(
-                            ),
-                            reverse=True,
-                        )
-                        streamers_watching += streamers_with_multiplier[:2]
-
-                """
-                Twitch has a limit - you can't watch more than 2 channels at one time.
-                We take the first two streamers from the list as they have the highest priority (based on order or WatchStreak).
-                """
-                streamers_watching = streamers_watching[:2]
+                streamers_watching = self.select_streamers_to_watch(
+                    streamers, streamers_index, priority
+                )
 
                 for index in streamers_watching:
                     next_iteration = time.time() + 60 / len(streamers_watching)
 
-                    try:
-                        response = requests.post(
-                            streamers[index].stream.spade_url,
-                            data=streamers[index].stream.encode_payload(),
-                            headers={"User-Agent": self.user_agent},
-                            timeout=60,
-                        )
-                        logger.debug(
-                            f"Send minute watched request for {streamers[index]} - Status code: {response.status_code}"
-                        )
-                        if response.status_code == 204:
-                            streamers[index].stream.update_minute_watched()
-
-                            """
-                            Remember, you can only earn progress towards a time-based Drop on one participating channel at a time.  [ ! ! ! ]
-                            You can also check your progress towards Drops within a campaign anytime by viewing the Drops Inventory.
-                            For time-based Drops, if you are unable to claim the Drop in time, you will be able to claim it from the inventory page until the Drops campaign ends.
-                            """
-
-                            for campaign in streamers[index].stream.campaigns:
-                                for drop in campaign.drops:
-                                    # We could add .has_preconditions_met condition inside is_printable
-                                    if (
-                                        drop.has_preconditions_met is not False
-                                        and drop.is_printable is True
-                                    ):
-                                        drop_messages = [
-                                            f"{streamers[index]} is streaming {streamers[index].stream}",
-                                            f"Campaign: {campaign}",
-                                            f"Drop: {drop}",
-                                            f"{drop.progress_bar()}",
-                                        ]
-                                        for single_line in drop_messages:
-                                            logger.info(
-                                                single_line,
-                                                extra={
-                                                    "event": Events.DROP_STATUS,
-                                                    "skip_telegram": True,
-                                                    "skip_discord": True,
-                                                    "skip_matrix": True,
-                                                },
-                                            )
-
-                                        if Settings.logger.telegram is not None:
-                                            Settings.logger.telegram.send(
-                                                "\n".join(drop_messages),
-                                                Events.DROP_STATUS,
-                                            )
-
-                                        if Settings.logger.discord is not None:
-                                            Settings.logger.discord.send(
-                                                "\n".join(drop_messages),
-                                                Events.DROP_STATUS,
-                                            )
-
-                    except requests.exceptions.ConnectionError as e:
-                        logger.error(
-                            f"Error while trying to send minute watched: {e}")
-                        self.__check_connection_handler(chunk_size)
-                    except requests.exceptions.Timeout as e:
-                        logger.error(
-                            f"Error while trying to send minute watched: {e}")
+                    with timed("send_minute_watched_events"):
+                        try:
+                            # Pick up the spade_url refreshed in background (if changed)
+                            self.get_spade_url(streamers[index], blocking=False)
+                            if streamers[index].stream.spade_url is None:
+                                # Not resolved yet, retried in background with a backoff
+                                logger.debug(
+                                    f"No spade_url for {streamers[index]}, minute watched skipped"
+                                )
+                            else:
+                                with MINUTE_WATCHED_LATENCY.time():
+                                    response = self.session.post(
+                                        streamers[index].stream.spade_url,
+                                        data=streamers[index].stream.encode_payload(),
+                                        headers={"User-Agent": self.user_agent},
+                                        timeout=60,
+                                    )
+                                MINUTE_WATCHED_REQUESTS.inc(response.status_code)
+                                logger.debug(
+                                    f"Send minute watched request for {streamers[index]} - Status code: {response.status_code}"
+                                )
+                                if response.status_code == 204:
+                                    streamers[index].stream.update_minute_watched()
+
+                                    """
+                                    Remember, you can only earn progress towards a time-based Drop on one participating channel at a time.  [ ! ! ! ]
+                                    You can also check your progress towards Drops within a campaign anytime by viewing the Drops Inventory.
+                                    For time-based Drops, if you are unable to claim the Drop in time, you will be able to claim it from the inventory page until the Drops campaign ends.
+                                    """
+
+                                    for campaign in streamers[index].stream.campaigns:
+                                        for drop in campaign.drops:
+                                            # We could add .has_preconditions_met condition inside is_printable
+                                            if (
+                                                drop.has_preconditions_met is not False
+                                                and drop.is_printable is True
+                                            ):
+                                                drop_messages = [
+                                                    f"{streamers[index]} is streaming {streamers[index].stream}",
+                                                    f"Campaign: {campaign}",
+                                                    f"Drop: {drop}",
+                                                    f"{drop.progress_bar()}",
+                                                ]
+                                                for single_line in drop_messages:
+                                                    logger.info(
+                                                        single_line,
+                                                        extra={
+                                                            "event": Events.DROP_STATUS,
+                                                            "skip_telegram": True,
+                                                            "skip_discord": True,
+                                                            "skip_matrix": True,
+                                                        },
+                                                    )
+
+                                                if Settings.logger.telegram is not None:
+                                                    Settings.logger.telegram.send(
+                                                        "\n".join(drop_messages),
+                                                        Events.DROP_STATUS,
+                                                    )
+
+                                                if Settings.logger.discord is not None:
+                                                    Settings.logger.discord.send(
+                                                        "\n".join(drop_messages),
+                                                        Events.DROP_STATUS,
+                                                    )
+                                else:
+                                    # Probably the spade_url is not valid anymore
+                                    self.spade_url_resolver.invalidate(
+                                        self.get_client_version(),
+                                        streamers[index].streamer_url,
+                                    )
+
+                        except requests.exceptions.ConnectionError as e:
+                            MINUTE_WATCHED_REQUESTS.inc("error")
+                            logger.error(
+                                f"Error while trying to send minute watched: {e}")
+                            self.__check_connection_handler(chunk_size)
+                        except requests.exceptions.Timeout as e:
+                            MINUTE_WATCHED_REQUESTS.inc("error")
+                            logger.error(
+                                f"Error while trying to send minute watched: {e}")
 
                     self.__chuncked_sleep(
                         next_iteration - time.time(), chunk_size=chunk_size
@@ -544,13 +779,39 @@ class Twitch(object):
 
     # === CHANNEL POINTS / PREDICTION === #
     # Load the amount of current points for a channel, check if a bonus is available
-    def load_channel_points_context(self, streamer):
+    def __channel_points_context_request(self, streamer):
         json_data = copy.deepcopy(GQLOperations.ChannelPointsContext)
         json_data["variables"] = {"channelLogin": streamer.username}
+        return json_data
 
-        response = self.post_gql_request(json_data)
+    def load_channel_points_context(self, streamer):
+        response = self.post_gql_request(
+            self.__channel_points_context_request(streamer)
+        )
+        self.__update_channel_points_context(streamer, response)
+
+    # Same as load_channel_points_context but for many streamers in batched requests
+    def load_channel_points_contexts(self, streamers):
+        responses = self.post_gql_requests(
+            [self.__channel_points_context_request(streamer) for streamer in streamers]
+        )
+        for streamer, response in zip(streamers, responses):
+            try:
+                self.__update_channel_points_context(streamer, response)
+            except StreamerDoesNotExistException:
+                logger.info(
+                    f"Streamer {streamer.username} does not exist",
+                    extra={"emoji": ":cry:"},
+                )
+            except (KeyError, TypeError) as e:
+                logger.error(
+                    f"Error while loading channel points context for {streamer}: {e}"
+                )
+
+    def __update_channel_points_context(self, streamer, response):
         if response != {}:
             if response["data"]["community"] is None:
+                self.channel_cache.invalidate(streamer.username)
                 raise StreamerDoesNotExistException
             channel = response["data"]["community"]["channel"]
             community_points = channel["self"]["communityPoints"]
@@ -561,6 +822,7 @@ class Twitch(object):
                 self.claim_bonus(
                     streamer, community_points["availableClaim"]["id"])
 
+    @instrumented("make_predictions")
     def make_predictions(self, event):
         decision = event.bet.calculate(event.streamer.channel_points)
         # selector_index = 0 if decision["choice"] == "A" else 1
@@ -652,7 +914,8 @@ class Twitch(object):
         json_data["variables"] = {
             "input": {"channelID": streamer.channel_id, "claimID": claim_id}
         }
-        self.post_gql_request(json_data)
+        # Claims for many channels usually arrive together (e.g. after a context refresh)
+        self.gql_batcher.submit(json_data)
 
     # === MOMENTS === #
     def claim_moment(self, streamer, moment_id):
@@ -725,6 +988,7 @@ class Twitch(object):
                     result.append(r["data"]["user"]["dropCampaign"])
         return result
 
+    @instrumented("sync_campaigns")
     def __sync_campaigns(self, campaigns):
         # We need the inventory only for get the real updated value/progress
         # Get data from inventory and sync current status with streamers.campaigns
@@ -17,7 +17,12 @@ from TwitchChannelPointsMiner.classes.Exceptions import (
     BadCredentialsException,
     WrongCookiesException,
 )
-from TwitchChannelPointsMiner.constants import CLIENT_ID, GQLOperations, USER_AGENTS
+from TwitchChannelPointsMiner.constants import (
+    CLIENT_ID,
+    GQLOperations,
+    OAUTH_URL,
+    USER_AGENTS,
+)
 
 from datetime import datetime, timedelta, timezone
 from time import sleep
@@ -89,7 +94,7 @@ class TwitchLogin(object):
             logger.info("Trying the TV login method..")
 
             login_response = self.send_oauth_request(
-                "https://id.twitch.tv/oauth2/device", post_data)
+                f"{OAUTH_URL}/device", post_data)
 
             # {
             #     "device_code": "40 chars [A-Za-z0-9]",
@@ -134,7 +139,7 @@ class TwitchLogin(object):
                     # sleep first, not like the user is gonna enter the code *that* fast
                     sleep(interval)
                     login_response = self.send_oauth_request(
-                        "https://id.twitch.tv/oauth2/token", post_data)
+                        f"{OAUTH_URL}/token", post_data)
                     if now == expires_at:
                         logger.error("Code expired. Try again")
                         break
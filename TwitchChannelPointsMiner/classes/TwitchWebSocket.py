@@ -20,18 +20,19 @@ class TwitchWebSocket(WebSocketApp):
 
         self.is_reconnecting = False
         self.forced_close = False
+        # Connection taken over by this one, closed once this one listens to its topics
+        self.replaces = None
 
         # Custom attribute
         self.topics = []
         self.pending_topics = []
+        # {nonce: [topics]} of the LISTEN requests waiting for their RESPONSE
+        self.listen_requests = {}
 
         self.twitch = parent_pool.twitch
         self.streamers = parent_pool.streamers
         self.events_predictions = parent_pool.events_predictions
 
-        self.last_message_timestamp = None
-        self.last_message_type_channel = None
-
         self.last_pong = time.time()
         self.last_ping = time.time()
 
@@ -39,12 +40,21 @@ class TwitchWebSocket(WebSocketApp):
     #     self.forced_close = True
     #     super().close()
 
-    def listen(self, topic, auth_token=None):
-        data = {"topics": [str(topic)]}
-        if topic.is_user_topic() and auth_token is not None:
-            data["auth_token"] = auth_token
-        nonce = create_nonce()
-        self.send({"type": "LISTEN", "nonce": nonce, "data": data})
+    # Send the topics in (at most) two LISTEN frames: the auth_token goes only with the user topics
+    def listen(self, topics, auth_token=None):
+        if isinstance(topics, list) is False:
+            topics = [topics]
+        user_topics = [topic for topic in topics if topic.is_user_topic()]
+        channel_topics = [topic for topic in topics if not topic.is_user_topic()]
+        for group in [user_topics, channel_topics]:
+            if group == []:
+                continue
+            data = {"topics": [str(topic) for topic in group]}
+            if group is user_topics and auth_token is not None:
+                data["auth_token"] = auth_token
+            nonce = create_nonce()
+            self.listen_requests[nonce] = group
+            self.send({"type": "LISTEN", "nonce": nonce, "data": data})
 
     def ping(self):
         self.send({"type": "PING"})
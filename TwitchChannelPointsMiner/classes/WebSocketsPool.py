@@ -11,25 +11,47 @@ from dateutil import parser
 from TwitchChannelPointsMiner.classes.entities.EventPrediction import EventPrediction
 from TwitchChannelPointsMiner.classes.entities.Message import Message
 from TwitchChannelPointsMiner.classes.entities.Raid import Raid
+from TwitchChannelPointsMiner.classes.entities.Streamer import StreamerList
+from TwitchChannelPointsMiner.classes.Metrics import (
+    PUBSUB_DUPLICATES,
+    PUBSUB_LISTEN_ERRORS,
+    PUBSUB_MESSAGES,
+    WEBSOCKET_RECONNECTS,
+)
+from TwitchChannelPointsMiner.classes.Profiler import instrumented, pubsub_topic
+from TwitchChannelPointsMiner.classes.RecentMessages import RecentMessages
 from TwitchChannelPointsMiner.classes.Settings import Events, Settings
 from TwitchChannelPointsMiner.classes.TwitchWebSocket import TwitchWebSocket
 from TwitchChannelPointsMiner.constants import WEBSOCKET
-from TwitchChannelPointsMiner.utils import (
-    get_streamer_index,
-    internet_connection_available,
-)
+from TwitchChannelPointsMiner.utils import internet_connection_available
 
 logger = logging.getLogger(__name__)
 
 
 class WebSocketsPool:
-    __slots__ = ["ws", "twitch", "streamers", "events_predictions"]
+    __slots__ = [
+        "ws",
+        "twitch",
+        "streamers",
+        "events_predictions",
+        "failures",
+        "recent_messages",
+    ]
 
     def __init__(self, twitch, streamers, events_predictions):
         self.ws = []
+        # {index: reconnections since the connection last listened to its topics}
+        self.failures = {}
         self.twitch = twitch
-        self.streamers = streamers
+        # Shared with the miner, the messages are routed with the channel_id index
+        self.streamers = (
+            streamers
+            if isinstance(streamers, StreamerList)
+            else StreamerList(streamers)
+        )
         self.events_predictions = events_predictions
+        # Messages already handled, by any of the connections
+        self.recent_messages = RecentMessages()
 
     """
     API Limits
@@ -39,24 +61,35 @@ class WebSocketsPool:
     """
 
     def submit(self, topic):
-        # Check if we need to create a new WebSocket instance
-        if self.ws == [] or len(self.ws[-1].topics) >= 50:
-            self.ws.append(self.__new(len(self.ws)))
-            self.__start(-1)
-
-        self.__submit(-1, topic)
-
-    def __submit(self, index, topic):
-        # Topic in topics should never happen. Anyway prevent any types of duplicates
-        if topic not in self.ws[index].topics:
-            self.ws[index].topics.append(topic)
-
+        self.submit_many([topic])
+
+    # Fill the connections up to 50 topics each. The new connections are started with
+    # their topics pending and send them in batch once opened
+    def submit_many(self, topics):
+        batches = {}
+        started = len(self.ws)
+        for topic in topics:
+            # Check if we need to create a new WebSocket instance
+            if self.ws == [] or len(self.ws[-1].topics) >= 50:
+                self.ws.append(self.new_connection(len(self.ws)))
+            index = len(self.ws) - 1
+            # Topic in topics should never happen. Anyway prevent any types of duplicates
+            if topic not in self.ws[index].topics:
+                self.ws[index].topics.append(topic)
+                batches.setdefault(index, []).append(topic)
+
+        for index, batch in batches.items():
+            self.__submit(index, batch)
+        for index in range(started, len(self.ws)):
+            self.start_connection(index)
+
+    def __submit(self, index, topics):
         if self.ws[index].is_opened is False:
-            self.ws[index].pending_topics.append(topic)
+            self.ws[index].pending_topics += topics
         else:
-            self.ws[index].listen(topic, self.twitch.twitch_login.get_auth_token())
+            self.ws[index].listen(topics, self.twitch.twitch_login.get_auth_token())
 
-    def __new(self, index):
+    def new_connection(self, index):
         return TwitchWebSocket(
             index=index,
             parent_pool=self,
@@ -68,7 +101,7 @@ class WebSocketsPool:
             # on_close=WebSocketsPool.handle_reconnection, # Do nothing.
         )
 
-    def __start(self, index):
+    def start_connection(self, index):
         if Settings.disable_ssl_cert_verification is True:
             import ssl
 
@@ -86,8 +119,12 @@ class WebSocketsPool:
 
     def end(self):
         for index in range(0, len(self.ws)):
-            self.ws[index].forced_close = True
-            self.ws[index].close()
+            # And the old connections if a replacement is taking over
+            ws = self.ws[index]
+            while ws is not None:
+                ws.forced_close = True
+                ws.close()
+                ws = ws.replaces
 
     @staticmethod
     def on_open(ws):
@@ -95,21 +132,27 @@ class WebSocketsPool:
             ws.is_opened = True
             ws.ping()
 
-            for topic in ws.pending_topics:
-                ws.listen(topic, ws.twitch.twitch_login.get_auth_token())
+            pending_topics, ws.pending_topics = ws.pending_topics, []
+            ws.listen(pending_topics, ws.twitch.twitch_login.get_auth_token())
+
+            if ws.replaces is not None:
+                # Close the old connection even if some LISTEN responses never come
+                handover = Timer(30, ws.parent_pool.finish_handover, args=(ws,))
+                handover.daemon = True
+                handover.start()
 
             while ws.is_closed is False:
                 # Else: the ws is currently in reconnecting phase, you can't do ping or other operation.
-                # Probably this ws will be closed very soon with ws.is_closed = True
+                # Its replacement is opening, this ws will be closed very soon with ws.is_closed = True
                 if ws.is_reconnecting is False:
                     ws.ping()  # We need ping for keep the connection alive
-                    time.sleep(random.uniform(25, 30))
+                time.sleep(random.uniform(25, 30))
 
-                    if ws.elapsed_last_pong() > 5:
-                        logger.info(
-                            f"#{ws.index} - The last PONG was received more than 5 minutes ago"
-                        )
-                        WebSocketsPool.handle_reconnection(ws)
+                if ws.is_reconnecting is False and ws.elapsed_last_pong() > 5:
+                    logger.info(
+                        f"#{ws.index} - The last PONG was received more than 5 minutes ago"
+                    )
+                    WebSocketsPool.handle_reconnection(ws)
 
         thread_ws = Thread(target=run)
         thread_ws.daemon = True
@@ -124,47 +167,82 @@ class WebSocketsPool:
     @staticmethod
     def on_close(ws, close_status_code, close_reason):
         logger.info(f"#{ws.index} - WebSocket closed")
+        ws.is_closed = True
         # On close please reconnect automatically
         WebSocketsPool.handle_reconnection(ws)
 
+    # The replacement is opened right away: the old connection (if still open) keeps
+    # receiving the messages until the new one listens to all the topics
     @staticmethod
     def handle_reconnection(ws):
         # Reconnect only if ws.is_reconnecting is False to prevent more than 1 ws from being created
         if ws.is_reconnecting is False:
-            # Close the current WebSocket.
-            ws.is_closed = True
-            ws.keep_running = False
-            # Reconnect only if ws.forced_close is False (replace the keep_running)
-
             # Set the current socket as reconnecting status
             # So the external ping check will be locked
             ws.is_reconnecting = True
 
+            # Reconnect only if ws.forced_close is False (replace the keep_running)
             if ws.forced_close is False:
-                logger.info(
-                    f"#{ws.index} - Reconnecting to Twitch PubSub server in ~60 seconds"
-                )
-                time.sleep(30)
-
-                while internet_connection_available() is False:
-                    random_sleep = random.randint(1, 3)
-                    logger.warning(
-                        f"#{ws.index} - No internet connection available! Retry after {random_sleep}m"
-                    )
-                    time.sleep(random_sleep * 60)
-
-                # Why not create a new ws on the same array index? Let's try.
-                self = ws.parent_pool
-                # Create a new connection.
-                self.ws[ws.index] = self.__new(ws.index)
-
-                self.__start(ws.index)  # Start a new thread.
-                time.sleep(30)
+                WEBSOCKET_RECONNECTS.inc(ws.index)
+                ws.parent_pool.schedule_reconnection(ws)
+
+    def schedule_reconnection(self, ws):
+        # Jittered exponential backoff if the replacements keep failing: 0s, 1-2s, 2-4s... up to 5 minutes
+        failures = self.failures.get(ws.index, 0)
+        self.failures[ws.index] = failures + 1
+        delay = 0 if failures == 0 else random.uniform(0.5, 1) * min(300, 2**failures)
+        logger.info(
+            f"#{ws.index} - Reconnecting to Twitch PubSub server in ~{round(delay)} seconds"
+        )
+        timer = Timer(delay, self.__reconnect, args=(ws,))
+        timer.daemon = True
+        timer.name = f"WebSocket #{ws.index} reconnection"
+        timer.start()
+
+    def __reconnect(self, ws):
+        # end() was called, or this connection was already replaced
+        if ws.forced_close is True or self.ws[ws.index] is not ws:
+            return
+        if internet_connection_available() is False:
+            logger.warning(f"#{ws.index} - No internet connection available!")
+            self.schedule_reconnection(ws)
+            return
+
+        # Why not create a new ws on the same array index? Let's try.
+        new_ws = self.new_connection(ws.index)
+        new_ws.topics = list(ws.topics)
+        new_ws.pending_topics = list(ws.topics)
+        # The oldest connection still open keeps receiving the messages until the handover.
+        # The messages received by both during the overlap are skipped with recent_messages
+        if ws.replaces is not None and self.__is_open(ws.replaces) is True:
+            # ws never took over: close it, the new one replaces its predecessor
+            new_ws.replaces, ws.replaces = ws.replaces, None
+            ws.forced_close = True
+            ws.close()
+        else:
+            new_ws.replaces = ws if self.__is_open(ws) is True else None
+            ws.replaces = None
+        self.ws[ws.index] = new_ws
+
+        self.start_connection(ws.index)  # Start a new thread.
+
+    # Called once the connection listens to all its topics: close the connection it replaces
+    def finish_handover(self, ws):
+        # Already replaced: its successor takes over the old connection
+        if self.ws[ws.index] is not ws:
+            return
+        self.failures[ws.index] = 0
+        old, ws.replaces = ws.replaces, None
+        if old is not None:
+            old.forced_close = True
+            old.close()
 
-                for topic in ws.topics:
-                    self.__submit(ws.index, topic)
+    @staticmethod
+    def __is_open(ws):
+        return ws.is_opened is True and ws.is_closed is False
 
     @staticmethod
+    @instrumented("on_message", label=pubsub_topic)
     def on_message(ws, message):
         logger.debug(f"#{ws.index} - Received: {message.strip()}")
         response = json.loads(message)
@@ -172,30 +250,26 @@ class WebSocketsPool:
         if response["type"] == "MESSAGE":
             # We should create a Message class ...
             message = Message(response["data"])
+            PUBSUB_MESSAGES.inc(message.topic)
 
             # If we have more than one PubSub connection, messages may be duplicated
-            # Check the concatenation between message_type.top.channel_id
-            if (
-                ws.last_message_type_channel is not None
-                and ws.last_message_timestamp is not None
-                and ws.last_message_timestamp == message.timestamp
-                and ws.last_message_type_channel == message.identifier
+            # Check the concatenation between message_type.top.channel_id and the timestamp
+            if ws.parent_pool.recent_messages.seen(
+                (message.identifier, message.timestamp)
             ):
+                PUBSUB_DUPLICATES.inc(message.topic)
                 return
 
-            ws.last_message_timestamp = message.timestamp
-            ws.last_message_type_channel = message.identifier
-
-            streamer_index = get_streamer_index(ws.streamers, message.channel_id)
-            if streamer_index != -1:
+            streamer = ws.streamers.get_by_channel_id(message.channel_id)
+            if streamer is not None:
                 try:
                     if message.topic == "community-points-user-v1":
                         if message.type in ["points-earned", "points-spent"]:
                             balance = message.data["balance"]["balance"]
-                            ws.streamers[streamer_index].channel_points = balance
+                            streamer.channel_points = balance
                             # Analytics switch
                             if Settings.enable_analytics is True:
-                                ws.streamers[streamer_index].persistent_series(
+                                streamer.persistent_series(
                                     event_type=message.data["point_gain"]["reason_code"]
                                     if message.type == "points-earned"
                                     else "Spent"
@@ -206,38 +280,34 @@ class WebSocketsPool:
                             reason_code = message.data["point_gain"]["reason_code"]
 
                             logger.info(
-                                f"+{earned} → {ws.streamers[streamer_index]} - Reason: {reason_code}.",
+                                f"+{earned} → {streamer} - Reason: {reason_code}.",
                                 extra={
                                     "emoji": ":rocket:",
                                     "event": Events.get(f"GAIN_FOR_{reason_code}"),
                                 },
                             )
-                            ws.streamers[streamer_index].update_history(
-                                reason_code, earned
-                            )
+                            streamer.update_history(reason_code, earned)
                             # Analytics switch
                             if Settings.enable_analytics is True:
-                                ws.streamers[streamer_index].persistent_annotations(
+                                streamer.persistent_annotations(
                                     reason_code, f"+{earned} - {reason_code}"
                                 )
                         elif message.type == "claim-available":
                             ws.twitch.claim_bonus(
-                                ws.streamers[streamer_index],
+                                streamer,
                                 message.data["claim"]["id"],
                             )
 
                     elif message.topic == "video-playback-by-id":
                         # There is stream-up message type, but it's sent earlier than the API updates
                         if message.type == "stream-up":
-                            ws.streamers[streamer_index].stream_up = time.time()
+                            streamer.stream_up = time.time()
                         elif message.type == "stream-down":
-                            if ws.streamers[streamer_index].is_online is True:
-                                ws.streamers[streamer_index].set_offline()
+                            if streamer.is_online is True:
+                                streamer.set_offline()
                         elif message.type == "viewcount":
-                            if ws.streamers[streamer_index].stream_up_elapsed():
-                                ws.twitch.check_streamer_online(
-                                    ws.streamers[streamer_index]
-                                )
+                            if streamer.stream_up_elapsed():
+                                ws.twitch.check_streamer_online(streamer)
 
                     elif message.topic == "raid":
                         if message.type == "raid_update_v2":
@@ -245,13 +315,11 @@ class WebSocketsPool:
                                 message.message["raid"]["id"],
                                 message.message["raid"]["target_login"],
                             )
-                            ws.twitch.update_raid(ws.streamers[streamer_index], raid)
+                            ws.twitch.update_raid(streamer, raid)
 
                     elif message.topic == "community-moments-channel-v1":
                         if message.type == "active":
-                            ws.twitch.claim_moment(
-                                ws.streamers[streamer_index], message.data["moment_id"]
-                            )
+                            ws.twitch.claim_moment(streamer, message.data["moment_id"])
 
                     elif message.topic == "predictions-channel-v1":
 
@@ -270,11 +338,13 @@ class WebSocketsPool:
                                     event_dict["prediction_window_seconds"]
                                 )
                                 # Reduce prediction window by 3/6s - Collect more accurate data for decision
-                                prediction_window_seconds = ws.streamers[
-                                    streamer_index
-                                ].get_prediction_window(prediction_window_seconds)
+                                prediction_window_seconds = (
+                                    streamer.get_prediction_window(
+                                        prediction_window_seconds
+                                    )
+                                )
                                 event = EventPrediction(
-                                    ws.streamers[streamer_index],
+                                    streamer,
                                     event_id,
                                     event_dict["title"],
                                     parser.parse(event_dict["created_at"]),
@@ -283,10 +353,9 @@ class WebSocketsPool:
                                     event_dict["outcomes"],
                                 )
                                 if (
-                                    ws.streamers[streamer_index].is_online
+                                    streamer.is_online
                                     and event.closing_bet_after(current_tmsp) > 0
                                 ):
-                                    streamer = ws.streamers[streamer_index]
                                     bet_settings = streamer.settings.bet
                                     if (
                                         bet_settings.minimum_points is None
@@ -364,19 +433,17 @@ class WebSocketsPool:
                                     },
                                 )
 
-                                ws.streamers[streamer_index].update_history(
-                                    "PREDICTION", points["gained"]
-                                )
+                                streamer.update_history("PREDICTION", points["gained"])
 
                                 # Remove duplicate history records from previous message sent in community-points-user-v1
                                 if event_prediction.result["type"] == "REFUND":
-                                    ws.streamers[streamer_index].update_history(
+                                    streamer.update_history(
                                         "REFUND",
                                         -points["placed"],
                                         counter=-1,
                                     )
                                 elif event_prediction.result["type"] == "WIN":
-                                    ws.streamers[streamer_index].update_history(
+                                    streamer.update_history(
                                         "PREDICTION",
                                         -points["won"],
                                         counter=-1,
@@ -385,9 +452,7 @@ class WebSocketsPool:
                                 if event_prediction.result["type"]:
                                     # Analytics switch
                                     if Settings.enable_analytics is True:
-                                        ws.streamers[
-                                            streamer_index
-                                        ].persistent_annotations(
+                                        streamer.persistent_annotations(
                                             event_prediction.result["type"],
                                             f"{ws.events_predictions[event_id].title}",
                                         )
@@ -395,7 +460,7 @@ class WebSocketsPool:
                                 event_prediction.bet_confirmed = True
                                 # Analytics switch
                                 if Settings.enable_analytics is True:
-                                    ws.streamers[streamer_index].persistent_annotations(
+                                    streamer.persistent_annotations(
                                         "PREDICTION_MADE",
                                         f"Decision: {event_prediction.bet.decision['choice']} - {event_prediction.title}",
                                     )
@@ -405,11 +470,29 @@ class WebSocketsPool:
                         exc_info=True,
                     )
 
-        elif response["type"] == "RESPONSE" and len(response.get("error", "")) > 0:
-            # raise RuntimeError(f"Error while trying to listen for a topic: {response}")
+        elif response["type"] == "RESPONSE":
+            topics = ws.listen_requests.pop(response.get("nonce"), [])
             error_message = response.get("error", "")
-            logger.error(f"Error while trying to listen for a topic: {error_message}")
-            
+            if len(error_message) == 0:
+                if topics != [] and ws.listen_requests == {}:
+                    ws.parent_pool.finish_handover(ws)
+                return
+            PUBSUB_LISTEN_ERRORS.inc(error_message)
+
+            # A single bad topic fails the whole frame: retry the topics one by one to find it
+            if len(topics) > 1 and "ERR_BADAUTH" not in error_message:
+                logger.warning(
+                    f"#{ws.index} - Error while trying to listen for {len(topics)} topics: {error_message}. Retrying one by one"
+                )
+                for topic in topics:
+                    ws.listen([topic], ws.twitch.twitch_login.get_auth_token())
+                return
+
+            # raise RuntimeError(f"Error while trying to listen for a topic: {response}")
+            logger.error(
+                f"Error while trying to listen for {', '.join(map(str, topics)) or 'a topic'}: {error_message}"
+            )
+
             # Check if the error message indicates an authentication issue (ERR_BADAUTH)
             if "ERR_BADAUTH" in error_message:
                 # Inform the user about the potential outdated cookie file
@@ -428,7 +511,7 @@ class WebSocketsPool:
 
         elif response["type"] == "RECONNECT":
             logger.info(f"#{ws.index} - Reconnection required")
-            WebSocketsPool.handle_reconnection(ws)
+            ws.parent_pool.handle_reconnection(ws)
 
         elif response["type"] == "PONG":
             ws.last_pong = time.time()
@@ -1,6 +1,4 @@
-import json
 import logging
-import os
 import time
 from datetime import datetime
 from threading import Lock
@@ -225,7 +223,8 @@ class Streamer(object):
     def persistent_series(self, event_type="Watch"):
         self.__save_json("series", event_type=event_type)
 
-    def __save_json(self, key, data={}, event_type="Watch"):
+    def __save_json(self, key, data=None, event_type="Watch"):
+        data = {} if data is None else data
         # https://stackoverflow.com/questions/4676195/why-do-i-need-to-multiply-unix-timestamps-by-1000-in-javascript
         now = datetime.now().replace(microsecond=0)
         data.update({"x": round(datetime.timestamp(now) * 1000)})
@@ -235,21 +234,8 @@ class Streamer(object):
             if event_type is not None:
                 data.update({"z": event_type.replace("_", " ").title()})
 
-        fname = os.path.join(Settings.analytics_path, f"{self.username}.json")
-        temp_fname = fname + '.temp'  # Temporary file name
-
-        with self.mutex:
-            # Create and write to the temporary file
-            with open(temp_fname, "w") as temp_file:
-                json_data = json.load(
-                    open(fname, "r")) if os.path.isfile(fname) else {}
-                if key not in json_data:
-                    json_data[key] = []
-                json_data[key].append(data)
-                json.dump(json_data, temp_file, indent=4)
-
-            # Replace the original file with the temporary file
-            os.replace(temp_fname, fname)
+        # Queued, written on disk by the AnalyticsWriter thread
+        Settings.analytics_writer.append(self.username, key, data)
 
     def leave_chat(self):
         if self.irc_chat is not None:
@@ -282,3 +268,64 @@ class Streamer(object):
                     self.leave_chat()
                 elif self.settings.chat == ChatPresence.OFFLINE:
                     self.__join_chat()
+
+
+# List of streamers with an index by channel_id, kept in sync on every change:
+# the PubSub messages are routed in O(1) instead of scanning all the streamers.
+# The channel_id must be set before the streamer is added (call reindex() otherwise)
+class StreamerList(list):
+    __slots__ = ["by_channel_id"]
+
+    def __init__(self, streamers=()):
+        super().__init__(streamers)
+        self.by_channel_id = {}
+        self.reindex()
+
+    def reindex(self):
+        self.by_channel_id = {str(streamer.channel_id): streamer for streamer in self}
+
+    def get_by_channel_id(self, channel_id):
+        return self.by_channel_id.get(str(channel_id))
+
+    def __add(self, streamers):
+        for streamer in streamers:
+            self.by_channel_id[str(streamer.channel_id)] = streamer
+
+    def append(self, streamer):
+        super().append(streamer)
+        self.__add([streamer])
+
+    def insert(self, index, streamer):
+        super().insert(index, streamer)
+        self.__add([streamer])
+
+    def extend(self, streamers):
+        streamers = list(streamers)
+        super().extend(streamers)
+        self.__add(streamers)
+
+    def __iadd__(self, streamers):
+        self.extend(streamers)
+        return self
+
+    # Removals are O(n) on the list anyway, rebuild the index
+    def remove(self, streamer):
+        super().remove(streamer)
+        self.reindex()
+
+    def pop(self, index=-1):
+        streamer = super().pop(index)
+        self.reindex()
+        return streamer
+
+    def clear(self):
+        super().clear()
+        self.by_channel_id = {}
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self.reindex()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self.reindex()
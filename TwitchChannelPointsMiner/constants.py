@@ -1,8 +1,14 @@
-# Twitch endpoints
-URL = "https://www.twitch.tv"
-IRC = "irc.chat.twitch.tv"
-IRC_PORT = 6667
-WEBSOCKET = "wss://pubsub-edge.twitch.tv/v1"
+import os
+
+# Twitch endpoints, the TWITCH_MINER_* environment variables point the miner
+# to another server (e.g. the local fake: python -m TwitchChannelPointsMiner.classes.FakeTwitch)
+URL = os.environ.get("TWITCH_MINER_URL", "https://www.twitch.tv")
+IRC = os.environ.get("TWITCH_MINER_IRC", "irc.chat.twitch.tv")
+IRC_PORT = int(os.environ.get("TWITCH_MINER_IRC_PORT", 6667))
+WEBSOCKET = os.environ.get("TWITCH_MINER_WEBSOCKET", "wss://pubsub-edge.twitch.tv/v1")
+OAUTH_URL = os.environ.get("TWITCH_MINER_OAUTH_URL", "https://id.twitch.tv/oauth2")
+# host:port used to check the internet connection
+CONNECTIVITY_CHECK = os.environ.get("TWITCH_MINER_CONNECTIVITY_CHECK", "8.8.8.8:53")
 CLIENT_ID = "ue6666qo983tsx6so1t0vnawi233wa"        # TV
 # CLIENT_ID = "kimne78kx3ncx6brgo4mv6wki5h1ko"      # Browser
 # CLIENT_ID = "kd1unb4b3q4t58fwlpcbzcbnm76a8fp"     # Android App
@@ -35,8 +41,10 @@ GITHUB_url = (
 
 
 class GQLOperations:
-    url = "https://gql.twitch.tv/gql"
-    integrity_url = "https://gql.twitch.tv/integrity"
+    url = os.environ.get("TWITCH_MINER_GQL_URL", "https://gql.twitch.tv/gql")
+    integrity_url = os.environ.get(
+        "TWITCH_MINER_GQL_INTEGRITY_URL", "https://gql.twitch.tv/integrity"
+    )
     WithIsStreamLiveQuery = {
         "operationName": "WithIsStreamLiveQuery",
         "extensions": {
@@ -7,6 +7,7 @@ import sys
 from datetime import datetime
 from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
+from threading import Lock
 
 import emoji
 from colorama import Fore, init
@@ -243,6 +244,65 @@ class GlobalFormatter(logging.Formatter):
             self.settings.pushover.send(record.msg, record.event)
 
 
+# Send the formatted log lines to the subscribers (e.g. the /log/stream clients of the analytics server).
+# Each subscriber has its own bounded queue, a slow client loses the lines instead of blocking the logging
+class LogBroadcaster(logging.Handler):
+    def __init__(self, max_queue_size: int = 1000):
+        super().__init__()
+        self.max_queue_size = max_queue_size
+        self.subscribers = set()
+        self.mutex = Lock()
+
+    def subscribe(self):
+        subscriber = queue.Queue(self.max_queue_size)
+        with self.mutex:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.mutex:
+            self.subscribers.discard(subscriber)
+
+    def emit(self, record):
+        if len(self.subscribers) == 0:
+            return
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self.mutex:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(line)
+            except queue.Full:
+                pass
+
+
+# Add a LogBroadcaster to the handlers of a running QueueListener
+def attach_log_broadcaster(queue_listener):
+    broadcaster = LogBroadcaster()
+    file_handler = next(
+        (h for h in queue_listener.handlers if isinstance(h, logging.FileHandler)),
+        None,
+    )
+    if file_handler is not None:
+        broadcaster.setFormatter(file_handler.formatter)
+        broadcaster.setLevel(file_handler.level)
+    else:
+        # Don't use the GlobalFormatter of the console, it sends the notifications
+        broadcaster.setFormatter(
+            logging.Formatter(
+                fmt="%(asctime)s - %(levelname)s - %(name)s - [%(funcName)s]: %(message)s",
+                datefmt="%d/%m/%y %H:%M:%S",
+            )
+        )
+    # The listener thread reads the tuple on each record
+    queue_listener.handlers = queue_listener.handlers + (broadcaster,)
+    return broadcaster
+
+
 def configure_loggers(username, settings):
     if settings.colored is True:
         init(autoreset=True)
@@ -10,22 +10,17 @@ from random import randrange
 import requests
 from millify import millify
 
-from TwitchChannelPointsMiner.constants import USER_AGENTS, GITHUB_url
+from TwitchChannelPointsMiner.constants import (
+    CONNECTIVITY_CHECK,
+    USER_AGENTS,
+    GITHUB_url,
+)
 
 
 def _millify(input, precision=2):
     return millify(input, precision)
 
 
-def get_streamer_index(streamers: list, channel_id) -> int:
-    try:
-        return next(
-            i for i, x in enumerate(streamers) if str(x.channel_id) == str(channel_id)
-        )
-    except StopIteration:
-        return -1
-
-
 def float_round(number, ndigits=2):
     return round(float(number), ndigits)
 
@@ -147,7 +142,10 @@ def set_default_settings(settings, defaults):
     return 0 if char == "A" else 1'''
 
 
-def internet_connection_available(host="8.8.8.8", port=53, timeout=3):
+def internet_connection_available(host=None, port=None, timeout=3):
+    if host is None:
+        host, port = CONNECTIVITY_CHECK.rsplit(":", 1)
+        port = int(port)
     try:
         socket.setdefaulttimeout(timeout)
         socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((host, port))
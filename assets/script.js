@@ -95,20 +95,24 @@ $(document).ready(function () {
     // Variable to keep track of whether log checkbox is checked
     var isLogCheckboxChecked = $('#log').prop('checked');
 
-    // Variable to keep track of the last received log index
-    var lastReceivedLogIndex = 0;
+    // Position (bytes) and id of the log file received with the last response
+    var logOffset = null;
+    var logFile = null;
 
-    // Function to get the full log content
+    // Function to get the new log lines
     function getLog() {
         if (isLogCheckboxChecked) {
-            $.get(`/log?lastIndex=${lastReceivedLogIndex}`, function (data) {
+            // The first request returns only the tail of the file
+            var params = logOffset === null ? {} : { offset: logOffset, file: logFile };
+            $.get('/log', params, function (data, textStatus, jqXHR) {
                 // Process and display the new log entries received
                 $("#log-content").append(data);
                 // Scroll to the bottom of the log content
                 $("#log-content").scrollTop($("#log-content")[0].scrollHeight);
 
-                // Update the last received log index
-                lastReceivedLogIndex += data.length;
+                // Update the position in the log file
+                logOffset = jqXHR.getResponseHeader("X-Log-Offset");
+                logFile = jqXHR.getResponseHeader("X-Log-File");
 
                 // Call getLog() again after a certain interval (e.g., 1 second)
                 setTimeout(getLog, 1000);
@@ -231,20 +235,69 @@ function changeStreamer(streamer, index) {
     getStreamerData(streamer);
 }
 
+// Datas of the current streamer, the refresh downloads only the records saved after the cursor
+var streamerData = null;
+var refreshTimeout = null;
+
+// The series are downsampled by the server, more than ~2 points per pixel are not visible
+function chartMaxPoints() {
+    return Math.max(500, Math.round($("#chart").width() * 2));
+}
+
+// The delta starts at the cursor (included): skip the records already loaded with that timestamp
+function mergeRecords(records, delta, cursor) {
+    var known = new Set(records.filter(item => item.x === cursor).map(item => JSON.stringify(item)));
+    return records.concat(delta.filter(item => item.x !== cursor || !known.has(JSON.stringify(item))));
+}
+
 function getStreamerData(streamer) {
     if (currentStreamer == streamer) {
-        $.getJSON(`./json/${streamer}`, {
+        var params = {
             startDate: formatDate(startDate),
-            endDate: formatDate(endDate)
-        }, function (response) {
-            chart.updateSeries([{
-                name: streamer.replace(".json", ""),
-                data: response["series"]
-            }], true)
-            clearAnnotations();
-            annotations = response["annotations"];
-            updateAnnotations();
-            setTimeout(function () {
+            endDate: formatDate(endDate),
+            max_points: chartMaxPoints()
+        };
+        var key = `${streamer}|${params.startDate}|${params.endDate}`;
+        var isDelta = streamerData !== null && streamerData.key === key && streamerData.cursor !== undefined;
+        if (isDelta) params.since = streamerData.cursor;
+
+        $.getJSON(`./json/${streamer}`, params, function (response) {
+            // The user has selected another streamer (or date) in the meantime
+            if (currentStreamer != streamer) return;
+
+            if (isDelta && streamerData !== null && streamerData.key === key) {
+                // Replace the flat 'No Stream' line with the real points
+                if (response["series"].length > 0 && streamerData.series.every(point => point.z === 'No Stream'))
+                    streamerData.series = [];
+                var newSeries = mergeRecords(streamerData.series, response["series"], streamerData.cursor);
+                var newAnnotations = mergeRecords(streamerData.annotations, response["annotations"], streamerData.cursor);
+                response["series"] = newSeries.slice(streamerData.series.length);
+                response["annotations"] = newAnnotations.slice(streamerData.annotations.length);
+                streamerData.series = newSeries;
+                streamerData.annotations = newAnnotations;
+                streamerData.cursor = response["cursor"];
+            } else {
+                streamerData = {
+                    key: key,
+                    series: response["series"],
+                    annotations: response["annotations"],
+                    cursor: response["cursor"]
+                };
+            }
+
+            if (!isDelta || response["series"].length > 0) {
+                chart.updateSeries([{
+                    name: streamer.replace(".json", ""),
+                    data: streamerData.series
+                }], true)
+            }
+            if (!isDelta || response["annotations"].length > 0) {
+                clearAnnotations();
+                annotations = streamerData.annotations;
+                updateAnnotations();
+            }
+            clearTimeout(refreshTimeout);
+            refreshTimeout = setTimeout(function () {
                 getStreamerData(streamer);
             }, 300000); // 5 minutes
         });
@@ -252,7 +305,7 @@ function getStreamerData(streamer) {
 }
 
 function getAllStreamersData() {
-    $.getJSON(`./json_all`, function (response) {
+    $.getJSON(`./json_all`, { max_points: chartMaxPoints() }, function (response) {
         for (var i in response) {
             chart.appendSeries({
                 name: response[i]["name"].replace(".json", ""),
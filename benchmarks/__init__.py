@@ -0,0 +1,34 @@
+import statistics
+import timeit
+
+# {name: (setup, param, repeat)}
+BENCHMARKS = {}
+
+
+# Register a benchmark (asv style): setup(param) prepares the datas and returns the
+# function to time, called in a loop until it runs for at least ~0.2 seconds.
+# With manual=True the function is called once per repeat and returns its own duration
+# (e.g. the startup time measured against the local Twitch stand-in)
+def benchmark(params=(None,), repeat: int = 5, manual: bool = False):
+    def decorator(setup):
+        module = setup.__module__.rsplit(".", 1)[-1].replace("bench_", "")
+        for param in params:
+            name = f"{module}.{setup.__name__}"
+            if param is not None:
+                name += f"[{param}]"
+            BENCHMARKS[name] = (setup, param, repeat, manual)
+        return setup
+
+    return decorator
+
+
+# Median of the duration of one call, in seconds
+def measure(setup, param, repeat, manual):
+    function = setup() if param is None else setup(param)
+    if manual is True:
+        return statistics.median(function() for _ in range(repeat))
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return statistics.median(
+        duration / number for duration in timer.repeat(repeat, number)
+    )
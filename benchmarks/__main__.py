@@ -0,0 +1,134 @@
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+from benchmarks import BENCHMARKS, measure
+
+MODULES = [
+    "bench_pubsub",
+    "bench_bet",
+    "bench_minute_watched",
+    "bench_analytics",
+    "bench_startup",
+]
+PATH = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(PATH, "baseline.json")
+RESULTS = os.path.join(PATH, "results")
+
+
+def current_commit():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=PATH,
+                stderr=subprocess.DEVNULL,
+            )
+            .decode("utf-8")
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def format_duration(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+def load(fname):
+    try:
+        with open(fname, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save(fname, report):
+    with open(fname, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+# python -m benchmarks [names...] [--save] [--update-baseline] [--threshold 0.2]
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the miner hot paths")
+    parser.add_argument(
+        "names", nargs="*", help="Run only the benchmarks containing one of these names"
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="Save the results in results/<commit>.json"
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Replace the baseline values of the benchmarks that ran",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Slowdown (ratio - 1) reported as a regression",
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="Print the names of the benchmarks"
+    )
+    args = parser.parse_args()
+
+    for module in MODULES:
+        importlib.import_module(f"benchmarks.{module}")
+    selected = [
+        name
+        for name in BENCHMARKS
+        if args.names == [] or any(part in name for part in args.names)
+    ]
+    if args.list is True:
+        print("\n".join(selected))
+        return 0
+
+    baseline = load(BASELINE).get("results", {})
+    results = {}
+    regressions = []
+    for name in selected:
+        results[name] = measure(*BENCHMARKS[name])
+        line = f"{name:<65} {format_duration(results[name]):>10}"
+        if name in baseline:
+            ratio = results[name] / baseline[name]
+            line += f" {ratio:>6.2f}x"
+            if ratio > 1 + args.threshold:
+                line += " REGRESSION"
+                regressions.append(name)
+            elif ratio < 1 - args.threshold:
+                line += " faster"
+        print(line, flush=True)
+
+    report = {
+        "commit": current_commit(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": results,
+    }
+    if args.save is True:
+        os.makedirs(RESULTS, exist_ok=True)
+        save(os.path.join(RESULTS, f"{report['commit']}.json"), report)
+    if args.update_baseline is True:
+        report["results"] = dict(baseline, **results)
+        save(BASELINE, report)
+
+    if regressions != []:
+        print(f"{len(regressions)} regressions (> {args.threshold:.0%} slower than the baseline)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
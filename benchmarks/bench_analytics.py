@@ -0,0 +1,62 @@
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import benchmark
+from benchmarks.fixtures import make_streamers
+from TwitchChannelPointsMiner.classes.AnalyticsServer import IndexedDatas, filter_datas
+from TwitchChannelPointsMiner.classes.AnalyticsStore import (
+    AnalyticsStore,
+    SqliteAnalyticsStore,
+)
+from TwitchChannelPointsMiner.classes.AnalyticsWriter import AnalyticsWriter
+from TwitchChannelPointsMiner.classes.Settings import Settings
+
+STORES = {"jsonl": AnalyticsStore, "sqlite": SqliteAnalyticsStore}
+
+
+def series(count, step=5 * 60 * 1000):
+    end = round(time.time() * 1000)
+    return [
+        {"x": end - (count - index) * step, "y": 1000 + index, "z": "Watch"}
+        for index in range(count)
+    ]
+
+
+# 100 points saved with Streamer.persistent_series (__save_json) and written on the
+# store by the AnalyticsWriter, <backend>-<records already saved>
+@benchmark(params=[f"{name}-{count}" for name in STORES for count in [1000, 100000]])
+def save_json(param):
+    name, count = param.split("-")
+    directory = tempfile.TemporaryDirectory()
+    store = STORES[name](directory.name)
+    store.append_many("channel0", [("series", point) for point in series(int(count))])
+    writer = AnalyticsWriter(store)
+    streamer = make_streamers(1)[0]
+
+    def run():
+        Settings.analytics_writer = writer
+        for _ in range(100):
+            streamer.persistent_series()
+        # What the writer thread does, without waiting for its flush interval
+        while writer.queue.empty() is False:
+            username, key, data = writer.queue.get_nowait()
+            writer.pending[username].append((key, data))
+            writer.pending_count += 1
+        writer.flush()
+
+    # Removed with the function, at the end of the benchmark
+    run.directory = directory
+    return run
+
+
+# Last 7 days (a point every 5 minutes) out of <points> in memory
+@benchmark(params=[1000, 10000, 100000])
+def filter_last_week(count):
+    datas = IndexedDatas({"series": series(count), "annotations": []})
+    start_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+
+    def run():
+        filter_datas(start_date, None, datas)
+
+    return run
@@ -0,0 +1,32 @@
+from benchmarks import benchmark
+from benchmarks.fixtures import outcomes
+from TwitchChannelPointsMiner.classes.entities.Bet import Bet, BetSettings, Strategy
+
+
+# Outcomes sent by predictions-channel-v1 (event-updated), <outcomes>x<top predictors>
+@benchmark(params=["2x10", "10x10"])
+def update_outcomes(param):
+    count, predictors = (int(value) for value in param.split("x"))
+    settings = BetSettings()
+    settings.default()
+    bet = Bet(outcomes(count, predictors), settings)
+    updates = [outcomes(count, predictors, seed=seed) for seed in range(10)]
+
+    def run():
+        for update in updates:
+            bet.update_outcomes(update)
+
+    return run
+
+
+@benchmark(params=[strategy.name for strategy in Strategy])
+def calculate(strategy):
+    settings = BetSettings(strategy=Strategy[strategy], stealth_mode=True)
+    settings.default()
+    bet = Bet(outcomes(), settings)
+    bet.update_outcomes(outcomes(seed=1))
+
+    def run():
+        bet.calculate(100000)
+
+    return run
@@ -0,0 +1,31 @@
+from benchmarks import benchmark
+from benchmarks.fixtures import make_streamers
+from TwitchChannelPointsMiner.classes.Settings import Priority
+from TwitchChannelPointsMiner.classes.Twitch import Twitch
+
+PRIORITIES = {
+    "order": [Priority.ORDER],
+    "streak-drops-order": [Priority.STREAK, Priority.DROPS, Priority.ORDER],
+    "points": [Priority.POINTS_DESCEDING],
+    "subscribed": [Priority.SUBSCRIBED, Priority.ORDER],
+}
+
+
+# Priority selection of send_minute_watched_events, <priority>-<online streamers>
+@benchmark(params=[f"{name}-{count}" for name in PRIORITIES for count in [10, 1000]])
+def select_streamers_to_watch(param):
+    name, count = param.rsplit("-", 1)
+    streamers = make_streamers(int(count))
+    for index, streamer in enumerate(streamers):
+        # Worst case for STREAK and DROPS: no streamer matches, the whole list is scanned
+        streamer.stream.watch_streak_missing = False
+        streamer.settings.claim_drops = False
+        if index % 10 == 0:
+            streamer.activeMultipliers = [{"factor": 0.2}]
+    streamers_index = list(range(len(streamers)))
+    priority = PRIORITIES[name]
+
+    def run():
+        Twitch.select_streamers_to_watch(streamers, streamers_index, priority)
+
+    return run
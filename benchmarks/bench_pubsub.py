@@ -0,0 +1,80 @@
+import json
+import random
+
+from benchmarks import benchmark
+from benchmarks.fixtures import (
+    NullTwitch,
+    make_prediction,
+    make_streamers,
+    pubsub_messages,
+)
+from TwitchChannelPointsMiner.classes.entities.Message import Message
+from TwitchChannelPointsMiner.classes.RecentMessages import RecentMessages
+from TwitchChannelPointsMiner.classes.TwitchWebSocket import TwitchWebSocket
+from TwitchChannelPointsMiner.classes.WebSocketsPool import WebSocketsPool
+
+MIXES = ["points", "playback", "predictions", "mixed"]
+
+
+def messages_mix(mix, streamers):
+    if mix != "mixed":
+        return pubsub_messages(mix, streamers)
+    # Roughly the proportions of a busy account: mostly points and viewcount
+    messages = (
+        pubsub_messages("points", streamers, count=500, seed=1)
+        + pubsub_messages("playback", streamers, count=300, seed=2)
+        + pubsub_messages("predictions", streamers, count=200, seed=3)
+    )
+    random.Random(0).shuffle(messages)
+    return messages
+
+
+# 1000 messages through WebSocketsPool.on_message, <topic mix>-<number of streamers>
+@benchmark(params=[f"{mix}-{count}" for mix in MIXES for count in [10, 500]])
+def on_message(param):
+    mix, count = param.split("-")
+    streamers = make_streamers(int(count))
+    pool = WebSocketsPool(twitch=NullTwitch(), streamers=streamers, events_predictions={})
+    for streamer in streamers:
+        event_id = f"event-{streamer.channel_id}"
+        pool.events_predictions[event_id] = make_prediction(streamer, event_id)
+    ws = TwitchWebSocket(index=0, parent_pool=pool, url="ws://127.0.0.1")
+    messages = messages_mix(mix, streamers)
+
+    def run():
+        # Same messages on each call: they would be skipped as duplicates
+        pool.recent_messages.clear()
+        for message in messages:
+            WebSocketsPool.on_message(ws, message)
+
+    return run
+
+
+# 1000 Message objects from the data of the raw messages
+@benchmark(params=MIXES)
+def message_parsing(mix):
+    datas = [json.loads(message)["data"] for message in messages_mix(mix, make_streamers(100))]
+
+    def run():
+        for data in datas:
+            Message(data)
+
+    return run
+
+
+# 1000 de-duplication checks of messages already received, with <size> keys in the window
+@benchmark(params=[1000, 10000])
+def recent_messages(size):
+    recent = RecentMessages(max_size=size)
+    for index in range(size):
+        recent.seen(("points-earned.community-points-user-v1.2000", str(index)))
+    keys = [
+        ("points-earned.community-points-user-v1.2000", str(size + index // 2))
+        for index in range(1000)
+    ]
+
+    def run():
+        for key in keys:
+            recent.seen(key)
+
+    return run
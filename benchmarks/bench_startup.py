@@ -0,0 +1,73 @@
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import benchmark
+from TwitchChannelPointsMiner.classes.FakeTwitch import FakeTwitch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The TWITCH_MINER_* variables are read at import time: the miner runs in another process
+MINER = """
+import logging
+import sys
+
+from TwitchChannelPointsMiner import TwitchChannelPointsMiner
+from TwitchChannelPointsMiner.classes.entities.Streamer import StreamerSettings
+from TwitchChannelPointsMiner.logger import LoggerSettings
+
+miner = TwitchChannelPointsMiner(
+    username="fakeuser",
+    logger_settings=LoggerSettings(save=False, console_level=logging.WARNING),
+    streamer_settings=StreamerSettings(
+        make_predictions=False, follow_raid=False, claim_drops=False, claim_moments=False
+    ),
+)
+miner.mine([f"channel{index}" for index in range(int(sys.argv[1]))])
+"""
+
+
+# From the start of the miner process to the LISTEN of all its PubSub topics
+# (community-points-user-v1 and one video-playback-by-id per streamer), <streamers>
+@benchmark(params=[10, 100, 500], repeat=3, manual=True)
+def startup(count):
+    def run():
+        fake = FakeTwitch(username="fakeuser", channels=count, online_ratio=1, event_rate=0)
+        fake.start()
+        with tempfile.TemporaryDirectory() as directory:
+            # Skip the login
+            os.makedirs(os.path.join(directory, "cookies"))
+            with open(os.path.join(directory, "cookies", "fakeuser.pkl"), "wb") as f:
+                pickle.dump(
+                    [
+                        {"name": "auth-token", "value": "benchmark"},
+                        {"name": "persistent", "value": fake.user_id},
+                    ],
+                    f,
+                )
+            env = dict(os.environ, PYTHONPATH=ROOT, **fake.environment())
+            start = time.perf_counter()
+            process = subprocess.Popen(
+                [sys.executable, "-c", MINER, str(count)],
+                cwd=directory,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                while fake.stats["pubsub:topics"] < count + 1:
+                    if process.poll() is not None:
+                        raise RuntimeError("The miner exited during the startup")
+                    if time.perf_counter() - start > 300:
+                        raise RuntimeError("The miner didn't start in 5 minutes")
+                    time.sleep(0.01)
+                return time.perf_counter() - start
+            finally:
+                process.kill()
+                process.wait()
+                fake.stop()
+
+    return run
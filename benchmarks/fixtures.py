@@ -0,0 +1,149 @@
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from TwitchChannelPointsMiner.classes.entities.Bet import BetSettings
+from TwitchChannelPointsMiner.classes.entities.EventPrediction import EventPrediction
+from TwitchChannelPointsMiner.classes.entities.Streamer import (
+    Streamer,
+    StreamerSettings,
+)
+from TwitchChannelPointsMiner.classes.Settings import Settings
+from TwitchChannelPointsMiner.logger import LoggerSettings
+
+# Streamer.__str__ reads the logger settings
+Settings.logger = LoggerSettings()
+
+USER_ID = "1000"
+
+
+# Records the calls of the PubSub handlers instead of sending the requests
+class NullTwitch(object):
+    __slots__ = ["calls"]
+
+    def __init__(self):
+        self.calls = 0
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls += 1
+
+        return call
+
+
+def make_streamers(count, online=True, seed=0):
+    rng = random.Random(seed)
+    streamers = []
+    for index in range(count):
+        settings = StreamerSettings(bet=BetSettings())
+        settings.default()
+        settings.bet.default()
+        streamer = Streamer(f"channel{index}", settings=settings)
+        streamer.channel_id = str(2000 + index)
+        streamer.channel_points = rng.randint(0, 100000)
+        streamer.is_online = online
+        streamer.stream_up = 0
+        streamers.append(streamer)
+    return streamers
+
+
+def outcomes(count=2, predictors=10, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "title": f"Outcome {index}",
+            "color": "BLUE" if index == 0 else "PINK",
+            "total_users": rng.randint(1, 5000),
+            "total_points": rng.randint(1, 5000000),
+            "top_predictors": [
+                {"points": rng.randint(1, 250000), "user_display_name": f"user{n}"}
+                for n in range(predictors)
+            ],
+        }
+        for index in range(count)
+    ]
+
+
+def make_prediction(streamer, event_id):
+    return EventPrediction(
+        streamer,
+        event_id,
+        "Will we win?",
+        datetime.now(timezone.utc) - timedelta(seconds=10),
+        120,
+        "ACTIVE",
+        outcomes(),
+    )
+
+
+def envelope(topic, message):
+    return json.dumps(
+        {"type": "MESSAGE", "data": {"topic": topic, "message": json.dumps(message)}}
+    )
+
+
+# Raw PubSub messages, as received by WebSocketsPool.on_message
+def pubsub_messages(kind, streamers, count=1000, seed=0):
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc)
+    messages = []
+    for index in range(count):
+        streamer = rng.choice(streamers)
+        # Unique timestamps, the duplicated messages are skipped
+        timestamp = (start + timedelta(milliseconds=index)).isoformat()
+        if kind == "points":
+            messages.append(
+                envelope(
+                    f"community-points-user-v1.{USER_ID}",
+                    {
+                        "type": "points-earned",
+                        "data": {
+                            "timestamp": timestamp,
+                            "channel_id": streamer.channel_id,
+                            "point_gain": {
+                                "user_id": USER_ID,
+                                "channel_id": streamer.channel_id,
+                                "total_points": 10,
+                                "reason_code": "WATCH",
+                            },
+                            "balance": {
+                                "user_id": USER_ID,
+                                "channel_id": streamer.channel_id,
+                                "balance": streamer.channel_points + 10,
+                            },
+                        },
+                    },
+                )
+            )
+        elif kind == "playback":
+            messages.append(
+                envelope(
+                    f"video-playback-by-id.{streamer.channel_id}",
+                    {
+                        "type": "viewcount",
+                        "server_time": start.timestamp() + index / 1000,
+                        "viewers": rng.randint(1, 50000),
+                    },
+                )
+            )
+        elif kind == "predictions":
+            messages.append(
+                envelope(
+                    f"predictions-channel-v1.{streamer.channel_id}",
+                    {
+                        "type": "event-updated",
+                        "data": {
+                            "timestamp": timestamp,
+                            "event": {
+                                "id": f"event-{streamer.channel_id}",
+                                "channel_id": streamer.channel_id,
+                                "status": "ACTIVE",
+                                "outcomes": outcomes(seed=index),
+                            },
+                        },
+                    },
+                )
+            )
+    return messages
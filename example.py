@@ -9,7 +9,7 @@ from TwitchChannelPointsMiner.classes.Discord import Discord
 from TwitchChannelPointsMiner.classes.Telegram import Telegram
 from TwitchChannelPointsMiner.classes.Matrix import Matrix
 from TwitchChannelPointsMiner.classes.Pushover import Pushover
-from TwitchChannelPointsMiner.classes.Settings import Priority, Events, FollowersOrder
+from TwitchChannelPointsMiner.classes.Settings import Priority, Events, FollowersOrder, AnalyticsBackend, PubSubEngine
 from TwitchChannelPointsMiner.classes.entities.Bet import Strategy, BetSettings, Condition, OutcomeKeys, FilterCondition, DelayMode
 from TwitchChannelPointsMiner.classes.entities.Streamer import Streamer, StreamerSettings
 
@@ -23,8 +23,13 @@ twitch_miner = TwitchChannelPointsMiner(
         Priority.ORDER                          # - When we have all of the drops claimed and no watch-streak available, use the order priority (POINTS_ASCENDING, POINTS_DESCEDING)
     ],
     enable_analytics=False,                     # Disables Analytics if False. Disabling it significantly reduces memory consumption
+    analytics_backend=AnalyticsBackend.JSON_LINES,  # Where to save the analytics: JSON_LINES files or a SQLITE database (faster date-filtered dashboard queries)
     disable_ssl_cert_verification=False,        # Set to True at your own risk and only to fix SSL: CERTIFICATE_VERIFY_FAILED error
     disable_at_in_nickname=False,               # Set to True if you want to check for your nickname mentions in the chat even without @ sign
+    gql_rate_limit=None,                        # Max GQL requests per second sent to Twitch, also the bets and claims (None = unlimited)
+    bootstrap_workers=8,                        # Threads used to check which streamers are online on startup
+    pubsub_engine=PubSubEngine.THREADS,         # THREADS or ASYNCIO: all the PubSub connections on one event loop (pip install websockets)
+    enable_instrumentation=False,               # Record the timings of the hot paths (/metrics) and profile the threads on SIGUSR1 (kill -USR1 <pid>)
     logger_settings=LoggerSettings(
         save=True,                              # If you want to save logs in a file (suggested)
         console_level=logging.INFO,             # Level of logs - use logging.DEBUG for more info
@@ -101,6 +106,7 @@ twitch_miner = TwitchChannelPointsMiner(
 # If you haven't set any value even in the instance the default one will be used
 
 #twitch_miner.analytics(host="127.0.0.1", port=5000, refresh=5, days_ago=7)   # Start the Analytics web-server
+#twitch_miner.metrics(host="127.0.0.1", port=9100)   # Prometheus metrics on /metrics (also available on the Analytics web-server)
 
 twitch_miner.mine(
     [
@@ -23,7 +23,7 @@ setuptools.setup(
     license="GPLv3+",
     keywords="python bot streaming script miner twtich channel-points",
     url="https://github.com/rdavydov/Twitch-Channel-Points-Miner-v2",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=["benchmarks", "benchmarks.*"]),
     include_package_data=True,
     install_requires=[
         "requests",
@@ -36,7 +36,6 @@ setuptools.setup(
         "colorama",
         "flask",
         "irc",
-        "pandas",
         "pytz"
     ],
     long_description=read("README.md"),